@@ -0,0 +1,39 @@
+"""
+Общая подготовка окружения для бенчмарков.
+
+Бенчмарки запускаются из корня проекта (python -m benchmarks.<имя>) и работают
+на временной тестовой БД, которую создают и удаляют сами, как manage.py test.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bolid_backend.settings")
+django.setup()
+# Предупреждения импорта о каждой строке забивают вывод замеров.
+logging.disable(logging.WARNING)
+
+from django.db import connection  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def timer(label, rows=None):
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    rate = f", {rows / elapsed:,.0f} строк/с" if rows else ""
+    print(f"{label:<40} {elapsed:8.3f} с{rate}")
@@ -0,0 +1,159 @@
+"""
+Нагрузка на настоящий сервер (Gunicorn, Uvicorn) по HTTP для бенчмарков.
+
+Сервер запускается отдельным процессом на временной тестовой БД из
+test_database(): её имя передаётся через DB_NAME, поэтому настройки должны
+брать имя БД оттуда. Клиент — asyncio с постоянными (keep-alive)
+соединениями, без сторонних HTTP-библиотек.
+"""
+
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+BOUNDARY = "benchmark-boundary"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def gunicorn_command(port, workers=1, threads=1):
+    """Команда entrypoint.sh: с threads > 1 Gunicorn берёт воркер gthread."""
+    return [
+        *(sys.executable, "-m", "gunicorn", "bolid_backend.wsgi:application"),
+        *("--bind", f"127.0.0.1:{port}", "--workers", str(workers)),
+        *("--threads", str(threads)),
+    ]
+
+
+def uvicorn_command(port, workers=1):
+    return [
+        *(sys.executable, "-m", "uvicorn", "bolid_backend.asgi:application"),
+        *("--port", str(port), "--workers", str(workers)),
+        *("--lifespan", "off", "--no-access-log", "--log-level", "warning"),
+    ]
+
+
+@contextmanager
+def server(command, env, port):
+    env = {**os.environ, "DB_NAME": connection.settings_dict["NAME"], **env}
+    process = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Сервер не запустился: {' '.join(command)}")
+                time.sleep(0.2)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def post_event(path, sensors):
+    """POST одного случайного события формой multipart, как шлют шлюзы."""
+    fields = {
+        "sensor_id": random.randint(1, sensors),
+        "name": "Temperature",
+        "temperature": round(random.uniform(-50, 150), 2),
+    }
+    body = "".join(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        f"{value}\r\n"
+        for name, value in fields.items()
+    )
+    body = f"{body}--{BOUNDARY}--\r\n".encode()
+    head = (
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: multipart/form-data; boundary={BOUNDARY}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+def get(path):
+    return f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+
+
+async def send(reader, writer, request):
+    """
+    Отправляет запрос и читает ответ целиком.
+
+    Возвращает код, тело ответа и признак Connection: close — sync-воркер
+    Gunicorn не держит соединения, после такого ответа нужно новое.
+    """
+    writer.write(request)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    close = False
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            close = value.strip().lower() == b"close"
+    return status, await reader.readexactly(length), close
+
+
+async def fetch(port, request):
+    """Один запрос по новому соединению; код и тело ответа."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        status, body, _ = await send(reader, writer, request)
+        return status, body
+    finally:
+        writer.close()
+
+
+async def connection_loop(port, requests, make_request, latencies):
+    writer = None
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            status, _, close = await send(reader, writer, make_request())
+            latencies.append(time.perf_counter() - started)
+            assert status in (200, 201, 202), status
+            if close:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def load(port, connections, requests, make_request):
+    """connections соединений по requests запросов; время и задержки запросов."""
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            connection_loop(port, requests, make_request, latencies)
+            for _ in range(connections)
+        )
+    )
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def percentile(latencies, share):
+    """Перцентиль отсортированных задержек в миллисекундах."""
+    return latencies[int((len(latencies) - 1) * share)] * 1000
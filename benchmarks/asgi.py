@@ -0,0 +1,91 @@
+"""
+Пропускная способность и задержки под параллельными соединениями: Gunicorn
+(WSGI) против Uvicorn (ASGI) с обычными и асинхронными вьюхами (ASYNC_VIEWS).
+Нагрузка — одиночные POST /events/ и GET /sensors/latest/ по постоянным
+(keep-alive) соединениям.
+
+Gunicorn запускается так же, как в entrypoint.sh: по умолчанию sync-воркер
+(GUNICORN_THREADS=1), с --threads > 1 ещё и воркер gthread.
+
+    python -m benchmarks.asgi --connections 32 --requests 200 --threads 16
+"""
+
+import argparse
+import asyncio
+
+from django.urls import reverse
+
+from benchmarks._common import test_database
+from benchmarks._http import (
+    free_port,
+    get,
+    gunicorn_command,
+    load,
+    percentile,
+    post_event,
+    server,
+    uvicorn_command,
+)
+from sensors.models import Sensor
+from sensors.utils import import_events
+
+
+def server_commands(port, workers, threads):
+    servers = [("WSGI, sync", gunicorn_command(port, workers), {})]
+    if threads > 1:
+        servers.append(
+            (f"WSGI, gthread x{threads}", gunicorn_command(port, workers, threads), {})
+        )
+    asgi = uvicorn_command(port, workers)
+    return [
+        *servers,
+        ("ASGI, обычные вьюхи", asgi, {"ASYNC_VIEWS": "0"}),
+        ("ASGI, async-вьюхи", asgi, {"ASYNC_VIEWS": "1"}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sensors", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1, help="Процессов сервера")
+    parser.add_argument(
+        "--threads", type=int, default=16, help="Потоков gthread; 1 — только sync"
+    )
+    args = parser.parse_args()
+
+    events_path = reverse("event-list", kwargs={"version": "v1"})
+    latest_path = reverse("sensor-latest", kwargs={"version": "v1"})
+    scenarios = [
+        ("POST /events/", lambda: post_event(events_path, args.sensors)),
+        ("GET /sensors/latest/", lambda: get(latest_path)),
+    ]
+    total = args.connections * args.requests
+    with test_database():
+        Sensor.objects.bulk_create(
+            Sensor(id=i, name=f"Sensor{i}", type=1) for i in range(1, args.sensors + 1)
+        )
+        import_events([{"sensor_id": i} for i in range(1, args.sensors + 1)])
+        print(
+            f"{'сервер':<22} {'запрос':<22} {'запросов/с':>11} "
+            f"{'p50, мс':>8} {'p99, мс':>8}"
+        )
+        port = free_port()
+        for label, command, env in server_commands(port, args.workers, args.threads):
+            with server(command, env, port):
+                for scenario, make_request in scenarios:
+                    # Прогрев: первые запросы процесса импортируют модули.
+                    asyncio.run(load(port, args.connections, 5, make_request))
+                    elapsed, latencies = asyncio.run(
+                        load(port, args.connections, args.requests, make_request)
+                    )
+                    print(
+                        f"{label:<22} {scenario:<22} {total / elapsed:>11,.0f} "
+                        f"{percentile(latencies, 0.5):>8.1f} "
+                        f"{percentile(latencies, 0.99):>8.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Запись событий через API: POST /events/ по одному против POST /events/bulk/.
+
+    python -m benchmarks.bulk_create --events 2000 --batch 500
+"""
+
+import argparse
+import random
+
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks._common import test_database, timer
+from sensors.models import Sensor
+
+
+def make_events(count, sensors):
+    return [
+        {
+            "sensor_id": random.randint(1, sensors),
+            "name": "Temperature",
+            "temperature": round(random.uniform(-50, 150), 2),
+            "humidity": round(random.uniform(0, 100), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    with test_database():
+        Sensor.objects.bulk_create(
+            Sensor(id=i, name=f"Sensor{i}", type=1) for i in range(1, args.sensors + 1)
+        )
+        client = Client(SERVER_NAME="localhost")
+        events = make_events(args.events, args.sensors)
+
+        url = reverse("event-list", kwargs={"version": "v1"})
+        with timer("POST /events/ по одному", args.events):
+            for event in events:
+                response = client.post(url, event)
+                assert response.status_code == 201, response.content
+
+        url = reverse("event-bulk", kwargs={"version": "v1"})
+        with timer(f"POST /events/bulk/ по {args.batch}", args.events):
+            for offset in range(0, args.events, args.batch):
+                end = offset + args.batch
+                batch = events[offset:end]
+                response = client.post(url, batch, content_type="application/json")
+                assert response.status_code == 201, response.content
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Размер и время выгрузки событий: JSON-список, NDJSON и колоночный формат.
+
+    python -m benchmarks.columnar --events 100000
+"""
+
+import argparse
+import time
+
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks._common import test_database, timer
+from benchmarks.pagination import fill_events
+from sensors.export import read_columnar
+
+
+def fetch(client, url, params):
+    response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with test_database():
+        with timer("подготовка данных", args.events):
+            fill_events(args.events, 20)
+        client = Client(SERVER_NAME="localhost")
+        list_url = reverse("event-list", kwargs={"version": "v1"})
+        export_url = reverse("event-export", kwargs={"version": "v1"})
+        cases = [
+            ("JSON-список", list_url, {"limit": args.events}),
+            ("NDJSON", export_url, {"output": "ndjson"}),
+            ("колонки", export_url, {"output": "columnar"}),
+            ("NDJSON + gzip", export_url, {"output": "ndjson", "compress": "gzip"}),
+            ("колонки + gzip", export_url, {"output": "columnar", "compress": "gzip"}),
+        ]
+        print(f"{'формат':<20} {'МБ':>8} {'байт/строку':>12} {'с':>7}")
+        for label, url, params in cases:
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                content = fetch(client, url, params)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(
+                f"{label:<20} {len(content) / 2**20:>8.2f} "
+                f"{len(content) / args.events:>12.1f} {best:>7.2f}"
+            )
+            if params.get("output") == "columnar" and "compress" not in params:
+                assert len(read_columnar(content)["sensor_id"]) == args.events
+
+
+if __name__ == "__main__":
+    main()
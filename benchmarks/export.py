@@ -0,0 +1,64 @@
+"""
+Выгрузка /events/export/: время и пик памяти Python на разном объёме.
+
+    python -m benchmarks.export --events 200000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks._common import test_database, timer
+from benchmarks.pagination import fill_events
+from sensors.models import Event
+
+
+def export(client, url, params):
+    """Читает выгрузку целиком, не сохраняя её; возвращает размер в байтах."""
+    response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    with test_database():
+        with timer("подготовка данных", args.events):
+            fill_events(args.events, 20)
+        client = Client(SERVER_NAME="localhost")
+        url = reverse("event-export", kwargs={"version": "v1"})
+        newest = Event.objects.order_by("-created_at").values_list("created_at", flat=True)
+        counts = [c for c in (1000, 10000, 100000) if c < args.events] + [args.events]
+
+        print(f"{'выгрузка':<12} {'строк':>8} {'МБ':>8} {'с':>7} {'пик памяти, МБ':>15}")
+        for output, compress in (("csv", None), ("ndjson", None), ("csv", "gzip")):
+            for count in counts:
+                # Последние count событий выбираются фильтром по created_from.
+                params = {
+                    "output": output,
+                    "created_from": newest[count - 1].isoformat(),
+                    "ordering": "created_at",
+                }
+                if compress:
+                    params["compress"] = compress
+                tracemalloc.start()
+                started = time.perf_counter()
+                size = export(client, url, params)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+                label = f"{output}+{compress}" if compress else output
+                print(
+                    f"{label:<12} {count:>8} {size / 2**20:>8.1f} {elapsed:>7.2f} "
+                    f"{peak:>15.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Сравнение построчного и пакетного импорта событий.
+
+    python -m benchmarks.import_events --events 20000 --sensors 200
+"""
+
+import argparse
+import json
+import random
+import tempfile
+
+from benchmarks._common import test_database, timer
+from sensors.models import Event, Sensor
+from sensors.utils import IMPORT_ENGINES, import_events_from_json
+
+
+def make_events_file(count, sensors):
+    events = [
+        {
+            "sensor_id": random.randint(1, sensors),
+            "name": random.choice(["Temperature", "Humidity", "N/A"]),
+            "temperature": round(random.uniform(-50, 150), 2),
+            "humidity": round(random.uniform(0, 110), 2),
+        }
+        for _ in range(count)
+    ]
+    tmp_file = tempfile.NamedTemporaryFile("w", delete=False, suffix=".json")
+    with tmp_file:
+        json.dump(events, tmp_file)
+    return tmp_file.name
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = make_events_file(args.events, args.sensors)
+    with test_database():
+        for engine in IMPORT_ENGINES:
+            Event.objects.all().delete()
+            Sensor.objects.all().delete()
+            with timer(f"engine={engine}", args.events):
+                import_events_from_json(path, engine=engine, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
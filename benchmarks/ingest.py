@@ -0,0 +1,100 @@
+"""
+Нагрузка одиночными POST /events/ на настоящий Gunicorn: транзакция на каждый
+запрос против записи пакетами (EVENTS_INGEST_BUFFER), с ожиданием записи и без.
+
+Sync-воркер (команда entrypoint.sh по умолчанию) обслуживает запросы по одному,
+поэтому буфер пишет каждое событие сразу; пакеты набираются только у воркера
+gthread (GUNICORN_THREADS > 1).
+
+    python -m benchmarks.ingest --connections 32 --requests 100 --threads 8
+"""
+
+import argparse
+import asyncio
+import json
+
+from django.urls import reverse
+
+from benchmarks._common import test_database
+from benchmarks._http import (
+    fetch,
+    free_port,
+    get,
+    gunicorn_command,
+    load,
+    percentile,
+    post_event,
+    server,
+)
+from sensors.models import Event, Sensor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--sensors", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8, help="Потоков воркера gthread")
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--max-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    buffered = {"EVENTS_INGEST_BUFFER": "1"}
+    modes = [
+        ("sync, транзакция на запрос", 1, {}),
+        ("sync, буфер", 1, buffered),
+        (f"gthread x{args.threads}, транзакция", args.threads, {}),
+        (f"gthread x{args.threads}, буфер", args.threads, buffered),
+        (
+            f"gthread x{args.threads}, без ожидания",
+            args.threads,
+            {**buffered, "EVENTS_INGEST_DURABLE": "0"},
+        ),
+    ]
+    events_path = reverse("event-list", kwargs={"version": "v1"})
+    stats_path = reverse("event-ingest-stats", kwargs={"version": "v1"})
+    total = args.connections * args.requests
+    with test_database():
+        Sensor.objects.bulk_create(
+            Sensor(id=i, name=f"Sensor{i}", type=1) for i in range(1, args.sensors + 1)
+        )
+        print(
+            f"{'режим':<30} {'запросов/с':>11} {'p50, мс':>8} {'p99, мс':>8} "
+            f"{'пакет, ср.':>11} {'запись p99, мс':>15}"
+        )
+        port = free_port()
+        for label, threads, env in modes:
+            env = {
+                "EVENTS_INGEST_MAX_BATCH": str(args.max_batch),
+                "EVENTS_INGEST_MAX_DELAY": str(args.max_delay),
+                **env,
+            }
+            with server(gunicorn_command(port, threads=threads), env, port):
+                before = Event.objects.count()
+                elapsed, latencies = asyncio.run(
+                    load(
+                        port,
+                        args.connections,
+                        args.requests,
+                        lambda: post_event(events_path, args.sensors),
+                    )
+                )
+                stats = None
+                if env.get("EVENTS_INGEST_BUFFER") == "1":
+                    status, body = asyncio.run(fetch(port, get(stats_path)))
+                    assert status == 200, body
+                    stats = json.loads(body)
+            # Без ожидания события дописываются после ответа: сервер остановлен,
+            # значит буфер уже сброшен.
+            assert Event.objects.count() - before == total
+            batch = f"{stats['batch_size']['avg']:.1f}" if stats else "1"
+            flush = f"{stats['flush_ms']['p99']:.1f}" if stats else "—"
+            print(
+                f"{label:<30} {total / elapsed:>11,.0f} "
+                f"{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.99):>8.1f} "
+                f"{batch:>11} {flush:>15}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Время ответа списка событий на разной глубине: limit/offset против курсора.
+
+    python -m benchmarks.pagination --events 200000 --limit 100
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks._common import test_database, timer
+from sensors.models import Event, Sensor
+from sensors.pagination import encode_cursor
+
+
+def fill_events(count, sensors):
+    Sensor.objects.bulk_create(
+        Sensor(id=i, name=f"Sensor{i}", type=1) for i in range(1, sensors + 1)
+    )
+    # auto_now_add перезаписал бы created_at, а события нужны растянутыми во времени.
+    field = Event._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        start = timezone.now() - timedelta(seconds=count)
+        Event.objects.bulk_create(
+            (
+                Event(
+                    sensor_id_id=random.randint(1, sensors),
+                    name="Temperature",
+                    temperature=round(random.uniform(-50, 150), 2),
+                    created_at=start + timedelta(seconds=i),
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+    finally:
+        field.auto_now_add = True
+
+
+def cursor_at(depth):
+    """Курсор на страницу, которая начинается со строки номер depth."""
+    event = Event.objects.order_by("-created_at", "-id")[depth - 1]
+    return encode_cursor(event.created_at, event.id)
+
+
+def measure(client, url, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        with timer("подготовка данных", args.events):
+            fill_events(args.events, args.sensors)
+        client = Client(SERVER_NAME="localhost")
+        url = reverse("event-list", kwargs={"version": "v1"})
+        depths = [0] + [
+            d for d in (1000, 10000, 100000, 1000000, 10000000) if d < args.events
+        ]
+        print(f"{'глубина':>10} {'offset, мс':>12} {'cursor, мс':>12}")
+        for depth in depths:
+            offset_url = f"{url}?limit={args.limit}&offset={depth}"
+            cursor = cursor_at(depth) if depth else ""
+            cursor_url = f"{url}?limit={args.limit}&cursor={cursor}"
+            offset_ms = measure(client, offset_url, args.repeat)
+            cursor_ms = measure(client, cursor_url, args.repeat)
+            print(f"{depth:>10} {offset_ms:>12.1f} {cursor_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
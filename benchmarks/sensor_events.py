@@ -0,0 +1,53 @@
+"""
+События одного датчика: общий список с ?sensor_id= против /sensors/{id}/events/.
+
+    python -m benchmarks.sensor_events --events 200000 --sensors 20
+"""
+
+import argparse
+
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks._common import test_database, timer
+from benchmarks.pagination import fill_events, measure
+from sensors.models import Event
+from sensors.pagination import encode_cursor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        with timer("подготовка данных", args.events):
+            fill_events(args.events, args.sensors)
+        client = Client(SERVER_NAME="localhost")
+        sensor_id = 1
+        events = Event.objects.filter(sensor_id=sensor_id).order_by("-created_at", "-id")
+        depth = events.count() // 2
+        middle = events[depth - 1]
+        cursor = encode_cursor(middle.created_at, middle.id)
+
+        global_url = reverse("event-list", kwargs={"version": "v1"})
+        nested_url = reverse("sensor-events", kwargs={"version": "v1", "pk": sensor_id})
+        cases = [
+            ("первая страница", "", ""),
+            (f"глубина {depth}", f"&offset={depth}", f"&cursor={cursor}"),
+        ]
+        print(f"{'':<20} {'?sensor_id=, мс':>16} {'/sensors/{id}/events/, мс':>26}")
+        for label, offset, cursor_param in cases:
+            query = f"?limit={args.limit}"
+            global_ms = measure(
+                client, f"{global_url}{query}&sensor_id={sensor_id}{offset}", args.repeat
+            )
+            nested_ms = measure(client, f"{nested_url}{query}{cursor_param}", args.repeat)
+            print(f"{label:<20} {global_ms:>16.1f} {nested_ms:>26.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Сериализация страницы списка событий: EventSerializer + JSONRenderer против
+values_list + compile_row_encoder + FastJSONRenderer.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+
+import argparse
+import time
+
+from django.test import Client
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks._common import test_database
+from benchmarks.pagination import fill_events
+from sensors.models import Event
+from sensors.renderers import FastJSONRenderer
+from sensors.serializers import EventSerializer
+from sensors.views import EVENT_LIST_FIELDS, encode_event_rows
+
+
+def best_of(repeat, func):
+    """Лучшее время из repeat запусков, мс, и результат последнего."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        fill_events(args.rows, 20)
+        events = Event.objects.order_by("-created_at")
+        instances = list(events)
+        rows = list(events.values_list(*EVENT_LIST_FIELDS, "created_at", named=True))
+
+        cases = [
+            (
+                "EventSerializer + JSONRenderer",
+                lambda: JSONRenderer().render(EventSerializer(instances, many=True).data),
+            ),
+            (
+                "кодировщик строк + JSONRenderer",
+                lambda: JSONRenderer().render(encode_event_rows(rows)),
+            ),
+            (
+                "кодировщик строк + FastJSONRenderer",
+                lambda: FastJSONRenderer().render(encode_event_rows(rows)),
+            ),
+        ]
+        print(f"{'только сериализация':<40} {'мс':>8} {'строк/с':>12}")
+        outputs = set()
+        for label, func in cases:
+            ms, content = best_of(args.repeat, func)
+            outputs.add(content)
+            print(f"{label:<40} {ms:>8.1f} {args.rows / ms * 1000:>12,.0f}")
+        assert len(outputs) == 1, "ответы различаются"
+
+        client = Client(SERVER_NAME="localhost")
+        url = f"{reverse('event-list', kwargs={'version': 'v1'})}?limit={args.rows}"
+        ms, response = best_of(args.repeat, lambda: client.get(url))
+        assert response.status_code == 200, response.content
+        print(f"{'GET /events/ целиком':<40} {ms:>8.1f} {args.rows / ms * 1000:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Валидация пакета событий: full_clean на каждое событие против validate_events.
+
+    python -m benchmarks.validation --events 100000 --invalid 0.01
+"""
+
+import argparse
+import random
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+
+from benchmarks._common import timer
+from sensors import validation
+from sensors.models import Event
+from sensors.validation import validate_events
+
+
+def make_batch(count, invalid):
+    """Пакет событий, в доле invalid из которых одно поле некорректно."""
+    names = ["Temperature", "Humidity", "N/A", "Датчик_1"]
+    broken = [("name", "Bad#Name"), ("temperature", -300.0), ("humidity", 101.5)]
+    batch = []
+    for i in range(count):
+        data = {
+            "name": random.choice(names),
+            "temperature": round(random.uniform(-50, 150), 2),
+            "humidity": random.choice([None, round(random.uniform(0, 100), 2)]),
+        }
+        if random.random() < invalid:
+            field, value = random.choice(broken)
+            data[field] = value
+        batch.append((i % 100 + 1, data))
+    return batch
+
+
+def full_clean(batch):
+    rejected = 0
+    for sensor_id, data in batch:
+        try:
+            Event(sensor_id_id=sensor_id, **data).full_clean(exclude=["sensor_id"])
+        except ValidationError:
+            rejected += 1
+    return rejected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--invalid", type=float, default=0.01)
+    args = parser.parse_args()
+
+    batch = make_batch(args.events, args.invalid)
+    with timer("full_clean на каждое событие", args.events):
+        expected = full_clean(batch)
+    if validation.numpy is not None:
+        with timer("validate_events, NumPy", args.events):
+            assert len(validate_events(batch)[1]) == expected
+    with mock.patch.object(validation, "numpy", None):
+        with timer("validate_events, без NumPy", args.events):
+            assert len(validate_events(batch)[1]) == expected
+    print(f"отклонено событий: {expected} из {args.events}")
+
+
+if __name__ == "__main__":
+    main()
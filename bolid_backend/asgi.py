@@ -9,8 +9,29 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
+from django.views.static import serve
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bolid_backend.settings")
+# Без WhiteNoiseMiddleware (см. settings.ASGI) цепочка middleware асинхронная.
+os.environ.setdefault("ASGI", "1")
+# Под ASGI самые нагруженные эндпоинты обслуживаются асинхронными вьюхами.
+os.environ.setdefault("ASYNC_VIEWS", "1")
 
-application = get_asgi_application()
+
+class StaticFilesHandler(ASGIStaticFilesHandler):
+    """
+    Отдаёт собранную collectstatic статику из STATIC_ROOT вместо WhiteNoise.
+
+    Стандартный обработчик ищет файлы по исходным каталогам приложений и не
+    знает имён с хешами из манифеста, поэтому файлы берутся из STATIC_ROOT.
+    Остальные запросы уходят приложению Django без изменений.
+    """
+
+    def serve(self, request):
+        return serve(request, self.file_path(request.path), settings.STATIC_ROOT)
+
+
+application = StaticFilesHandler(get_asgi_application())
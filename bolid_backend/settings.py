@@ -34,9 +34,15 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
 ]
 
+# Под ASGI (bolid_backend/asgi.py) статику отдаёт собственный обработчик:
+# WhiteNoiseMiddleware только синхронный, и с ним Django выполнял бы всю
+# цепочку middleware через SyncToAsync.
+ASGI = os.getenv("ASGI", "0") == "1"
+if not ASGI:
+    MIDDLEWARE.append("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = "bolid_backend.urls"
 
 TEMPLATES = [
@@ -67,6 +73,77 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Сколько id/ошибок импорта возвращать списком; сверх лимита — только счётчики.
+EVENTS_IMPORT_REPORT_LIMIT = int(os.getenv("EVENTS_IMPORT_REPORT_LIMIT", "10000"))
+
+# Способ записи импортируемых событий по умолчанию: "batch", "row" или "copy"
+# (COPY только в PostgreSQL), см. sensors.utils.IMPORT_ENGINES.
+EVENTS_IMPORT_ENGINE = os.getenv("EVENTS_IMPORT_ENGINE", "batch")
+
+EVENTS_IMPORT_BATCH_SIZE = int(os.getenv("EVENTS_IMPORT_BATCH_SIZE", "1000"))
+
+# Сколько событий можно передать в одном запросе POST /events/bulk/.
+EVENTS_BULK_MAX_SIZE = int(os.getenv("EVENTS_BULK_MAX_SIZE", "1000"))
+
+# Запись одиночных POST /events/ пакетами (sensors.ingest): пакет пишется, когда
+# наберёт EVENTS_INGEST_MAX_BATCH событий или через EVENTS_INGEST_MAX_DELAY секунд.
+# С EVENTS_INGEST_DURABLE=0 запрос не ждёт записи и получает 202 без id события.
+EVENTS_INGEST_BUFFER = os.getenv("EVENTS_INGEST_BUFFER", "0") == "1"
+EVENTS_INGEST_MAX_BATCH = int(os.getenv("EVENTS_INGEST_MAX_BATCH", "500"))
+EVENTS_INGEST_MAX_DELAY = float(os.getenv("EVENTS_INGEST_MAX_DELAY", "0.005"))
+EVENTS_INGEST_DURABLE = os.getenv("EVENTS_INGEST_DURABLE", "1") == "1"
+
+# Обслуживать POST /events/ и GET /sensors/latest/ асинхронными вьюхами
+# (sensors/async_views.py). Имеет смысл только под ASGI: bolid_backend/asgi.py
+# включает это по умолчанию, а под WSGI каждая такая вьюха запускала бы
+# собственный цикл событий.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "0") == "1"
+
+# Фоновые задачи импорта: куда сохранять загруженные файлы, как часто писать
+# прогресс в БД и через сколько секунд без прогресса считать воркер упавшим.
+IMPORT_JOBS_DIR = Path(os.getenv("IMPORT_JOBS_DIR", BASE_DIR / "import_jobs"))
+IMPORT_JOB_PROGRESS_INTERVAL = float(os.getenv("IMPORT_JOB_PROGRESS_INTERVAL", "1"))
+IMPORT_JOB_STALE_TIMEOUT = int(os.getenv("IMPORT_JOB_STALE_TIMEOUT", "600"))
+
+# Загрузка файлов по частям (/uploads/): через сколько секунд без новых частей
+# сессия удаляется и какого размера может быть одна часть.
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv("UPLOAD_CHUNK_MAX_SIZE", str(64 * 2**20)))
+
+# Сколько дней хранить сырые события по типу датчика (Sensor.type), формат
+# "1=30,2=90,*=30"; "*" — для остальных типов. Старые события сворачиваются в
+# сводки EventRollup и удаляются командой compact_events.
+EVENTS_RETENTION_DAYS = {
+    key.strip(): int(days)
+    for key, days in (
+        item.split("=") for item in os.getenv("EVENTS_RETENTION_DAYS", "*=30").split(",")
+    )
+}
+# Сколько событий удалять одной транзакцией.
+EVENTS_COMPACT_CHUNK_SIZE = int(os.getenv("EVENTS_COMPACT_CHUNK_SIZE", "5000"))
+# Сколько дней compact_events хранит ключи импорта с дедупликацией: событие,
+# присланное повторно позже этого срока, будет записано заново.
+EVENTS_DEDUP_KEY_DAYS = int(os.getenv("EVENTS_DEDUP_KEY_DAYS", "30"))
+
+# Начиная с какого числа строк (по оценке планировщика PostgreSQL) списки
+# событий показывают count по оценке вместо COUNT(*); 0 — всегда точно.
+EVENTS_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("EVENTS_COUNT_ESTIMATE_THRESHOLD", "100000")
+)
+# На сколько секунд кэшировать точные COUNT(*) с фильтрами (exact_count=true).
+EVENTS_COUNT_CACHE_TIMEOUT = int(os.getenv("EVENTS_COUNT_CACHE_TIMEOUT", "10"))
+
+# Сколько строк выгрузки /events/export/ читать из серверного курсора за раз.
+EVENTS_EXPORT_CHUNK_SIZE = int(os.getenv("EVENTS_EXPORT_CHUNK_SIZE", "2000"))
+
+# Кэш ответов GET API датчиков и событий: "" — выключен, "lru" — в памяти
+# процесса (при нескольких воркерах записи в одном не сбрасывают кэш других),
+# "django" — кэш Django из CACHES (API_CACHE_ALIAS), общий для всех воркеров.
+API_CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "")
+API_CACHE_ALIAS = os.getenv("API_CACHE_ALIAS", "default")
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", "60"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1000"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
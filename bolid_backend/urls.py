@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path, re_path
 from django.views.generic import RedirectView
@@ -6,7 +7,13 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 
-from sensors.views import EventViewSet, SensorViewSet
+from sensors.async_views import urlpatterns as async_urlpatterns
+from sensors.views import (
+    EventViewSet,
+    ImportJobViewSet,
+    SensorViewSet,
+    UploadSessionViewSet,
+)
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -24,12 +31,19 @@ schema_view = get_schema_view(
 router = DefaultRouter()
 router.register("sensors", SensorViewSet)
 router.register("events", EventViewSet)
+router.register("import-jobs", ImportJobViewSet, basename="import-job")
+router.register("uploads", UploadSessionViewSet, basename="upload")
+
+# Асинхронные вьюхи стоят перед маршрутами роутера с теми же путями.
+api_urlpatterns = router.urls
+if settings.ASYNC_VIEWS:
+    api_urlpatterns = async_urlpatterns + api_urlpatterns
 
 
 urlpatterns = [
     path("", RedirectView.as_view(url="/api/<version>/", permanent=False)),
     path("admin/", admin.site.urls),
-    path("api/<version>/", include(router.urls)),
+    path("api/<version>/", include(api_urlpatterns)),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
         schema_view.without_ui(cache_timeout=0),
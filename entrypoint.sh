@@ -21,7 +21,20 @@ done
 
 echo "Database ready. Applying migrations and collecting static..."
 python manage.py migrate --noinput
+python manage.py create_event_partitions
 python manage.py collectstatic --noinput
 
+if [ "${IMPORT_WORKER:-1}" = "1" ]; then
+  echo "Starting import worker..."
+  python manage.py run_import_worker &
+fi
+
+if [ "${ASGI:-0}" = "1" ]; then
+  echo "Starting Uvicorn..."
+  exec uvicorn bolid_backend.asgi:application --host 0.0.0.0 --port ${PORT:-8000} \
+    --lifespan off --no-access-log
+fi
+
 echo "Starting Gunicorn..."
-exec gunicorn bolid_backend.wsgi:application --bind 0.0.0.0:${PORT:-8000}
+exec gunicorn bolid_backend.wsgi:application --bind 0.0.0.0:${PORT:-8000} \
+  --threads ${GUNICORN_THREADS:-1}
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import Event, Sensor
+from .counts import EstimatedCountPaginator
+from .derived import record_changed_events
+from .models import Event, ImportJob, Sensor
 
 
 @admin.register(Sensor)
@@ -16,3 +19,42 @@ class EventAdmin(admin.ModelAdmin):
     list_filter = ("sensor_id", "created_at", "temperature", "humidity")
     search_fields = ("name", "sensor_id__id")
     ordering = ("-created_at",)
+    # COUNT(*) по всей таблице на каждой странице списка заменяется оценкой.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        keys = []
+        if change:
+            old = Event.objects.get(pk=obj.pk)
+            keys.append((old.sensor_id_id, old.created_at))
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            record_changed_events(keys + [(obj.sensor_id_id, obj.created_at)])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            record_changed_events([(obj.sensor_id_id, obj.created_at)])
+
+    def delete_queryset(self, request, queryset):
+        keys = list(queryset.values_list("sensor_id", "created_at"))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            record_changed_events(keys)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "status",
+        "engine",
+        "imported_count",
+        "failed_count",
+        "duplicate_count",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    ordering = ("-id",)
@@ -0,0 +1,326 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.functions import NullIf, Trunc
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from sensors.models import Event, EventRollup
+
+# Размеры интервалов агрегации и соответствующие им kind для date_trunc.
+BUCKETS = {
+    "1m": "minute",
+    "1h": "hour",
+    "1d": "day",
+    "1w": "week",
+    "1mo": "month",
+}
+AGGREGATE_FIELDS = ("temperature", "humidity")
+
+# Уровни сводок EventRollup и длина их интервала.
+ROLLUP_LEVELS = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+# Уровни сводок, из которых собирается интервал bucket, от крупного к мелкому.
+ROLLUP_SOURCES = {
+    "1m": ("1m",),
+    "1h": ("1h", "1m"),
+    "1d": ("1d", "1h", "1m"),
+    "1w": ("1d", "1h", "1m"),
+    "1mo": ("1d", "1h", "1m"),
+}
+ROLLUP_COLUMNS = (
+    "events",
+    "count_temperature",
+    "sum_temperature",
+    "min_temperature",
+    "max_temperature",
+    "count_humidity",
+    "sum_humidity",
+    "min_humidity",
+    "max_humidity",
+)
+
+
+def aggregate_events(queryset, bucket):
+    """
+    Группирует события по датчику и интервалу времени средствами БД.
+
+    Для каждой пары (датчик, начало интервала) считаются число событий и
+    min/max/avg температуры и влажности. Интервалы отсчитываются в часовом
+    поясе проекта (TIME_ZONE). Возвращает queryset словарей, упорядоченный по
+    датчику и времени.
+    """
+    metrics = {"count": Count("id")}
+    for field in AGGREGATE_FIELDS:
+        metrics[f"{field}_min"] = Min(field)
+        metrics[f"{field}_max"] = Max(field)
+        metrics[f"{field}_avg"] = Avg(field)
+    return (
+        queryset.order_by()
+        .annotate(bucket=Trunc("created_at", BUCKETS[bucket]))
+        .values("sensor_id", "bucket")
+        .annotate(**metrics)
+        .order_by("sensor_id", "bucket")
+    )
+
+
+def aggregate_rollups(level, bucket, sensor=None, created_from=None, created_to=None):
+    """То же, что aggregate_events, но по сводкам уровня level."""
+    rollups = EventRollup.objects.filter(granularity=level)
+    if sensor is not None:
+        rollups = rollups.filter(sensor=sensor)
+    if created_from is not None:
+        rollups = rollups.filter(start__gte=created_from)
+    if created_to is not None:
+        rollups = rollups.filter(start__lt=created_to)
+
+    metrics = {"count": Sum("events")}
+    for field in AGGREGATE_FIELDS:
+        metrics[f"{field}_min"] = Min(f"min_{field}")
+        metrics[f"{field}_max"] = Max(f"max_{field}")
+        metrics[f"{field}_avg"] = Sum(f"sum_{field}") / NullIf(Sum(f"count_{field}"), 0)
+    return (
+        rollups.annotate(bucket=Trunc("start", BUCKETS[bucket]))
+        .values("sensor_id", "bucket")
+        .annotate(**metrics)
+        .order_by("sensor_id", "bucket")
+    )
+
+
+def rollup_level(bucket, filters):
+    """
+    Выбирает уровень сводок, из которого можно точно собрать ответ.
+
+    filters — cleaned_data EventFilter. Сводки подходят, только если задан
+    лишь фильтр по датчику и границы периода, причём границы совпадают с
+    началом интервалов уровня. Иначе возвращает None: считать по событиям.
+    """
+    allowed = {"sensor_id", "created_from", "created_to"}
+    if any(value is not None for name, value in filters.items() if name not in allowed):
+        return None
+    bounds = [filters.get("created_from"), filters.get("created_to")]
+    for level in ROLLUP_SOURCES[bucket]:
+        if all(bound is None or bucket_start(bound, level) == bound for bound in bounds):
+            return level
+    return None
+
+
+def aggregate(filterset, bucket):
+    """Агрегаты по отфильтрованным событиям: из сводок, если это возможно."""
+    filterset.validate_ranges()
+    filters = filterset.form.cleaned_data
+    level = rollup_level(bucket, filters)
+    if level is None:
+        return aggregate_events(filterset.qs, bucket)
+    return aggregate_rollups(
+        level,
+        bucket,
+        sensor=filters.get("sensor_id"),
+        created_from=filters.get("created_from"),
+        created_to=filters.get("created_to"),
+    )
+
+
+def bucket_start(moment, level):
+    """Начало интервала уровня level, в который попадает moment."""
+    return _truncate(timezone.localtime(moment), level)
+
+
+def _truncate(local, level):
+    if level == "1m":
+        return local.replace(second=0, microsecond=0)
+    if level == "1h":
+        return local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollup_metrics():
+    metrics = {"events": Count("id")}
+    for field in AGGREGATE_FIELDS:
+        metrics[f"count_{field}"] = Count(field)
+        metrics[f"sum_{field}"] = Sum(field)
+        metrics[f"min_{field}"] = Min(field)
+        metrics[f"max_{field}"] = Max(field)
+    return metrics
+
+
+def _upsert_sql(rows):
+    """
+    INSERT ... ON CONFLICT DO UPDATE, прибавляющий дельты к сводкам.
+
+    Синтаксис одинаков для PostgreSQL и SQLite. min/max сравниваются через
+    CASE: LEAST/GREATEST в SQLite нет, а min()/max() от NULL дают NULL.
+    """
+    quote = connection.ops.quote_name
+    table = quote(EventRollup._meta.db_table)
+    updates = []
+    for column in ROLLUP_COLUMNS:
+        name = quote(column)
+        current, delta = f"{table}.{name}", f"EXCLUDED.{name}"
+        if column.startswith(("min_", "max_")):
+            op = "<" if column.startswith("min_") else ">"
+            updates.append(
+                f"{name} = CASE WHEN {current} IS NULL OR {delta} {op} {current} "
+                f"THEN {delta} ELSE {current} END"
+            )
+        elif column.startswith("sum_"):
+            updates.append(f"{name} = COALESCE({current} + {delta}, {current}, {delta})")
+        else:
+            updates.append(f"{name} = {current} + {delta}")
+    key = ", ".join(quote(c) for c in ("sensor_id", "granularity", "start"))
+    columns = f"{key}, {', '.join(quote(c) for c in ROLLUP_COLUMNS)}"
+    placeholders = "(" + ", ".join(["%s"] * (3 + len(ROLLUP_COLUMNS))) + ")"
+    return (
+        f"INSERT INTO {table} ({columns}) VALUES {', '.join([placeholders] * rows)} "
+        f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(updates)}"
+    )
+
+
+def add_to_rollups(rows):
+    """
+    Прибавляет новые события к сводкам всех уровней.
+
+    rows — кортежи (sensor_id, created_at, temperature, humidity). Дельты
+    сначала сворачиваются в памяти, затем записываются upsert'ом. Ключи
+    сортируются, чтобы параллельные импорты блокировали строки сводок в
+    одном порядке и не ловили deadlock.
+    """
+    # localtime() на каждую строку заметно тормозит пакетный импорт.
+    tz = timezone.get_current_timezone()
+    columns = [
+        (f"count_{f}", f"sum_{f}", f"min_{f}", f"max_{f}") for f in AGGREGATE_FIELDS
+    ]
+    deltas = {}
+    for sensor_id, created_at, *values in rows:
+        local = created_at.astimezone(tz)
+        for level in ROLLUP_LEVELS:
+            key = (sensor_id, level, _truncate(local, level))
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = dict.fromkeys(ROLLUP_COLUMNS)
+                delta.update(events=0, count_temperature=0, count_humidity=0)
+            delta["events"] += 1
+            for (count, total, low, high), value in zip(columns, values):
+                if value is None:
+                    continue
+                delta[count] += 1
+                delta[total] = value if delta[total] is None else delta[total] + value
+                delta[low] = value if delta[low] is None else min(delta[low], value)
+                delta[high] = value if delta[high] is None else max(delta[high], value)
+    if not deltas:
+        return
+
+    adapt = connection.ops.adapt_datetimefield_value
+    params = [
+        [sensor_id, level, adapt(start), *(delta[c] for c in ROLLUP_COLUMNS)]
+        for (sensor_id, level, start), delta in sorted(deltas.items())
+    ]
+    batch_size = (connection.features.max_query_params or 12000) // len(params[0])
+    with connection.cursor() as cursor:
+        for offset in range(0, len(params), batch_size):
+            end = offset + batch_size
+            batch = params[offset:end]
+            cursor.execute(_upsert_sql(len(batch)), [p for row in batch for p in row])
+
+
+def add_events_to_rollups(events):
+    add_to_rollups(
+        (event.sensor_id_id, event.created_at, event.temperature, event.humidity)
+        for event in events
+    )
+
+
+def refresh_rollups(keys):
+    """
+    Пересчитывает по событиям сводки, затронутые правкой или удалением.
+
+    keys — пары (sensor_id, created_at) событий до и после изменения. Дельту
+    здесь не вычесть (min/max необратимы), поэтому затронутые интервалы
+    считаются заново.
+    """
+    buckets = {
+        (sensor_id, level, bucket_start(created_at, level))
+        for sensor_id, created_at in keys
+        for level in ROLLUP_LEVELS
+    }
+    with transaction.atomic():
+        for sensor_id, level, start in sorted(buckets):
+            stats = Event.objects.filter(
+                sensor_id=sensor_id,
+                created_at__gte=start,
+                created_at__lt=start + ROLLUP_LEVELS[level],
+            ).aggregate(**_rollup_metrics())
+            if stats["events"]:
+                EventRollup.objects.update_or_create(
+                    sensor_id=sensor_id, granularity=level, start=start, defaults=stats
+                )
+            else:
+                EventRollup.objects.filter(
+                    sensor_id=sensor_id, granularity=level, start=start
+                ).delete()
+
+
+def rebuild_rollups(sensor_ids=None, since=None, until=None, batch_size=5000):
+    """
+    Строит сводки заново по событиям: для бэкфилла и после правок БД вручную.
+
+    Можно ограничить датчиками (список id или подзапрос) и периодом
+    [since, until); границы округляются до начала суток. Старые сводки
+    удаляются, а новые строятся в одной транзакции, так что читатели не
+    видят частично построенных данных. Возвращает число созданных сводок.
+    """
+    events = Event.objects.order_by()
+    rollups = EventRollup.objects.all()
+    if sensor_ids is not None:
+        events = events.filter(sensor_id__in=sensor_ids)
+        rollups = rollups.filter(sensor_id__in=sensor_ids)
+    if since is not None:
+        since = bucket_start(since, "1d")
+        events = events.filter(created_at__gte=since)
+        rollups = rollups.filter(start__gte=since)
+    if until is not None:
+        until = bucket_start(until, "1d")
+        events = events.filter(created_at__lt=until)
+        rollups = rollups.filter(start__lt=until)
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        for level in ROLLUP_LEVELS:
+            rows = (
+                events.annotate(start=Trunc("created_at", BUCKETS[level]))
+                .values("sensor_id", "start")
+                .annotate(**_rollup_metrics())
+            )
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(EventRollup(granularity=level, **row))
+                if len(batch) >= batch_size:
+                    created += len(EventRollup.objects.bulk_create(batch))
+                    batch = []
+            created += len(EventRollup.objects.bulk_create(batch))
+    return created
+
+
+def stream_json(head, rows, chunk_size=2000):
+    """
+    Отдаёт JSON-объект head с массивом rows в поле "results" по частям.
+
+    Строки читаются из БД через iterator(), поэтому ни результат запроса,
+    ни итоговый JSON целиком в памяти не собираются.
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    yield encoder.encode(head)[:-1] + ', "results": ['
+    parts, separator = [], ""
+    for row in rows.iterator(chunk_size=chunk_size):
+        parts.append(encoder.encode(row))
+        if len(parts) == chunk_size:
+            yield separator + ", ".join(parts)
+            parts, separator = [], ", "
+    if parts:
+        yield separator + ", ".join(parts)
+    yield "]}"
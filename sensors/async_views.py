@@ -0,0 +1,129 @@
+"""
+Асинхронные версии самых нагруженных эндпоинтов для запуска под ASGI.
+
+POST /events/ и GET /sensors/latest/ обслуживаются async-вьюхами без
+DRF (он не поддерживает асинхронные вьюхи): запросы к БД идут через
+асинхронный ORM Django, а запись — одним вызовом sync_to_async, как и
+любые транзакции. Сериализаторы, кэш ответов и буфер событий те же, что
+у вьюсетов, поэтому ответы совпадают байт в байт.
+
+Всё, что быстрый путь не поддерживает (другие методы, браузерный API,
+тела не в multipart/form-data, неизвестная версия API), передаётся
+обычным вьюсетам — клиент разницы не видит.
+Маршруты подключаются в bolid_backend/urls.py при ASYNC_VIEWS=1.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.http.multipartparser import MultiPartParserError
+from django.urls import path
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import get_response_cache
+from .ingest import get_ingest_buffer, save_event
+from .models import Event, Sensor, SensorLatest
+from .renderers import FastJSONRenderer
+from .serializers import BulkEventSerializer, EventSerializer, SensorLatestSerializer
+from .views import EVENT_QUEUED, EventViewSet, SensorViewSet
+
+JSON = "application/json"
+# Формы, которые умеют разбирать и Django, и парсеры EventViewSet.
+FORM_TYPES = {parser.media_type for parser in EventViewSet.parser_classes} & {
+    "application/x-www-form-urlencoded",
+    "multipart/form-data",
+}
+
+_event_list = sync_to_async(EventViewSet.as_view({"get": "list", "post": "create"}))
+_sensor_latest = sync_to_async(SensorViewSet.as_view({"get": "latest"}))
+
+
+def _json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), content_type=JSON, status=status)
+
+
+def _handles(request, version):
+    """Можно ли ответить быстрым путём: версия API известна и нужен JSON."""
+    return (
+        version in api_settings.ALLOWED_VERSIONS
+        and request.GET.get("format", "json") == "json"
+        and "text/html" not in request.headers.get("Accept", "")
+    )
+
+
+async def event_list(request, version):
+    if (
+        request.method != "POST"
+        or request.content_type not in FORM_TYPES
+        or not _handles(request, version)
+    ):
+        return await _event_list(request, version=version)
+    try:
+        data = request.POST
+    except MultiPartParserError as e:
+        # Тело уже прочитано, поэтому ошибка формируется здесь, как в DRF.
+        return _json_response({"detail": f"Multipart form parse error - {e}"}, 400)
+
+    # Датчик загружается заранее асинхронным запросом, чтобы проверка
+    # сериализатором не обращалась к БД.
+    sensors = await Sensor.objects.ain_bulk(BulkEventSerializer.sensor_ids([data]))
+    serializer = BulkEventSerializer(data=data, context={"sensors": sensors})
+    if not serializer.is_valid():
+        return _json_response(serializer.errors, status=400)
+
+    event = Event(**serializer.validated_data)
+    buffer = get_ingest_buffer()
+    if buffer is None:
+        await sync_to_async(save_event)(event)
+    else:
+        await sync_to_async(buffer.add)(event)
+        if not buffer.durable:
+            return _json_response(EVENT_QUEUED, status=202)
+    return _json_response(EventSerializer(event).data, status=201)
+
+
+async def _render_latest(request):
+    """Страница последних событий так же, как SensorViewSet.latest."""
+    paginator = LimitOffsetPagination()
+    paginator.request = request
+    limit = paginator.limit = paginator.get_limit(request)
+    offset = paginator.offset = paginator.get_offset(request)
+    queryset = SensorLatest.objects.order_by("sensor_id")
+    paginator.count = await queryset.acount()
+    end = offset + limit
+    page = [latest async for latest in queryset[offset:end]]
+    data = SensorLatestSerializer(page, many=True).data
+    return FastJSONRenderer().render(paginator.get_paginated_response(data).data)
+
+
+async def sensor_latest(request, version):
+    if request.method not in ("GET", "HEAD") or not _handles(request, version):
+        return await _sensor_latest(request, version=version)
+
+    # query_params для пагинатора и ключа кэша.
+    request = Request(request)
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return HttpResponse(await _render_latest(request), content_type=JSON)
+    key, generations, cached = await sync_to_async(response_cache.lookup)(
+        request, ("event",)
+    )
+    cache_status = "HIT"
+    if cached is None:
+        content = await _render_latest(request)
+        cached = await sync_to_async(response_cache.store)(key, generations, content, JSON)
+        cache_status = "MISS"
+    return response_cache.cached_response(request, *cached, status=cache_status)
+
+
+# Как и вьюсеты DRF, вьюхи освобождены от CsrfViewMiddleware. Декоратор
+# csrf_exempt в Django 4.2 оборачивает вьюху синхронной функцией, поэтому
+# атрибут ставится напрямую.
+event_list.csrf_exempt = True
+sensor_latest.csrf_exempt = True
+
+urlpatterns = [
+    path("events/", event_list, name="event-list-async"),
+    path("sensors/latest/", sensor_latest, name="sensor-latest-async"),
+]
@@ -0,0 +1,253 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+GENERATION_PREFIX = "sensors:generation:"
+# Версия в префиксе — формат записи изменился, старые записи не читаются.
+RESPONSE_PREFIX = "sensors:response:v2:"
+
+
+class LRUCacheBackend:
+    """
+    Кэш в памяти процесса с вытеснением давно не читанных записей.
+
+    Поколения хранятся отдельно и не вытесняются. Кэш у каждого процесса
+    свой: при нескольких воркерах запись в одном не сбрасывает кэш других,
+    и устаревший ответ живёт до API_CACHE_TIMEOUT.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_generations(self, scopes):
+        with self.lock:
+            return [self.generations.setdefault(scope, time.time()) for scope in scopes]
+
+    def bump(self, scope):
+        with self.lock:
+            # Две записи подряд не должны дать одно и то же поколение.
+            previous = self.generations.get(scope, 0)
+            self.generations[scope] = max(time.time(), previous + 1e-6)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generations.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Кэш через кэш Django (CACHES). С общим хранилищем (Redis, memcached)
+    поколения и ответы общие для всех воркеров.
+    """
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def get_generations(self, scopes):
+        keys = [GENERATION_PREFIX + scope for scope in scopes]
+        found = self.cache.get_many(keys)
+        generations = []
+        for key in keys:
+            if key not in found:
+                # add не перезапишет поколение, выставленное другим воркером.
+                self.cache.add(key, time.time(), None)
+                found[key] = self.cache.get(key, time.time())
+            generations.append(found[key])
+        return generations
+
+    def bump(self, scope):
+        self.cache.set(GENERATION_PREFIX + scope, time.time(), None)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+    """
+    Кэш отрендеренных JSON-ответов GET-запросов API.
+
+    Ключ — путь, нормализованные параметры запроса, хост и поколения
+    областей данных ("sensor", "event"), от которых зависит ответ. Запись
+    данных сдвигает поколение области, и старые ключи больше не
+    используются — перебирать и удалять их не нужно.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, name):
+        with self.stats_lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Попадания, промахи и ответы 304 с запуска процесса."""
+        with self.stats_lock:
+            return dict(self.counters)
+
+    def key(self, request, scopes, generations):
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        raw = repr(
+            (
+                request.path,
+                params,
+                request.get_host(),
+                request.scheme,
+                list(zip(scopes, generations)),
+            )
+        )
+        return RESPONSE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+    def lookup(self, request, scopes):
+        """Ключ ответа, поколения областей и закэшированный ответ (или None)."""
+        generations = self.backend.get_generations(scopes)
+        key = self.key(request, scopes, generations)
+        cached = self.backend.get(key)
+        self.count("misses" if cached is None else "hits")
+        return key, generations, cached
+
+    def store(self, key, generations, content, content_type):
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        cached = (content, content_type, etag)
+        self.backend.set(key, cached)
+        return cached
+
+    def respond(self, view, request, scopes, handler):
+        # Кэшируется только JSON: HTML браузерного API зависит от пользователя.
+        if request.accepted_renderer.format != "json":
+            return handler()
+        key, generations, cached = self.lookup(request, scopes)
+        if cached is not None:
+            return self.cached_response(request, *cached, status="HIT")
+
+        response = handler()
+        if response.status_code != 200:
+            return response
+        # Рендер здесь, а не в finalize_response: в кэш кладутся готовые байты.
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        response.render()
+        cached = self.store(key, generations, response.content, response["Content-Type"])
+        return self.cached_response(request, *cached, status="MISS")
+
+    def cached_response(self, request, content, content_type, etag, status):
+        # Без Last-Modified: с точностью до секунды две записи подряд дали бы
+        # одну дату, и клиент с If-Modified-Since получил бы 304 на старый ответ.
+        response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        response["X-Cache"] = status
+        conditional = get_conditional_response(request, etag=etag, response=response)
+        if conditional is not response:
+            self.count("not_modified")
+            conditional["X-Cache"] = status
+        return conditional
+
+
+_cache = None
+_cache_config = None
+
+
+def get_response_cache():
+    """Кэш ответов по текущим настройкам или None, если кэш выключен."""
+    global _cache, _cache_config
+    config = (
+        settings.API_CACHE_BACKEND,
+        settings.API_CACHE_TIMEOUT,
+        settings.API_CACHE_MAX_ENTRIES,
+        settings.API_CACHE_ALIAS,
+    )
+    if config != _cache_config:
+        backend, timeout, max_entries, alias = config
+        if not backend:
+            _cache = None
+        elif backend == "lru":
+            _cache = ResponseCache(LRUCacheBackend(max_entries, timeout))
+        elif backend == "django":
+            _cache = ResponseCache(DjangoCacheBackend(alias, timeout))
+        else:
+            raise ValueError(f"Неизвестный кэш ответов API: {backend}")
+        _cache_config = config
+    return _cache
+
+
+def invalidate_responses(*scopes):
+    """
+    Сбрасывает кэш ответов, зависящих от областей scopes.
+
+    Поколение сдвигается после фиксации транзакции: иначе параллельный
+    запрос успел бы закэшировать ещё старые данные под новым поколением.
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return
+
+    def bump():
+        for scope in scopes:
+            response_cache.backend.bump(scope)
+
+    transaction.on_commit(bump)
+
+
+def cache_response(*scopes):
+    """
+    Декоратор GET-действий вьюсета: отдаёт ответ из кэша ответов API.
+
+    scopes — области данных, запись в которые меняет ответ действия.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            response_cache = get_response_cache()
+            if response_cache is None:
+                return method(self, request, *args, **kwargs)
+            return response_cache.respond(
+                self, request, scopes, lambda: method(self, request, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
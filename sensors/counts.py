@@ -0,0 +1,76 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_CACHE_PREFIX = "sensors:count:"
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк queryset по плану запроса (EXPLAIN) без его выполнения.
+
+    Планировщик берёт оценку из статистики таблицы (reltuples, гистограммы
+    столбцов), поэтому на секционированной таблице и с фильтрами она тоже
+    работает. Точность зависит от свежести ANALYZE. Не на PostgreSQL
+    возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def exact_count(queryset):
+    """
+    Точный COUNT(*) по запросу клиента. Результат запроса с фильтрами
+    кэшируется на EVENTS_COUNT_CACHE_TIMEOUT секунд: одни и те же фильтры
+    обычно листают страницу за страницей, а каждый такой COUNT(*) по большой
+    выборке — полный проход по ней.
+    """
+    timeout = settings.EVENTS_COUNT_CACHE_TIMEOUT
+    if not timeout or not queryset.query.where:
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = COUNT_CACHE_PREFIX + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def smart_count(queryset, threshold=None):
+    """
+    Число строк queryset и признак того, что это оценка.
+
+    Если по плану запроса строк не меньше threshold (по умолчанию
+    EVENTS_COUNT_ESTIMATE_THRESHOLD), возвращается оценка планировщика,
+    иначе — точный COUNT(*), который при таком числе строк недорог и не
+    кэшируется. Порог 0 отключает оценки.
+    """
+    if threshold is None:
+        threshold = settings.EVENTS_COUNT_ESTIMATE_THRESHOLD
+    if threshold:
+        estimate = estimate_count(queryset)
+        if estimate is not None and estimate >= threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки, считающий строки через smart_count."""
+
+    @cached_property
+    def count(self):
+        return smart_count(self.object_list)[0]
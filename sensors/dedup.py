@@ -0,0 +1,116 @@
+"""
+Идемпотентный импорт: повторно присланные события не записываются второй раз.
+
+У каждого импортируемого события есть детерминированный ключ — хэш
+клиентского event_id либо содержимого (sensor_id, название, показания и
+клиентская метка времени timestamp). Ключи пакета вставляются в таблицу
+EventKey одним INSERT ... ON CONFLICT DO NOTHING RETURNING в той же
+транзакции, что и события: вернувшиеся ключи новые, остальные — дубликаты.
+Отдельного чтения на каждое событие нет.
+"""
+
+import hashlib
+import json
+import uuid
+
+from django.db import connection
+
+from sensors.models import EventKey
+from sensors.validation import MAX_EXACT_INT
+
+# Поля элемента импорта, которые в событии не хранятся, но задают его ключ.
+CLIENT_ID_FIELD = "event_id"
+CLIENT_TIME_FIELD = "timestamp"
+KEY_FIELDS = (CLIENT_ID_FIELD, CLIENT_TIME_FIELD)
+
+
+def _canonical(value):
+    # 20 и 20.0 — одно и то же показание.
+    if type(value) is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT:
+        return float(value)
+    return value
+
+
+def event_key(sensor_id, item):
+    """
+    Ключ события из элемента импорта.
+
+    С клиентским event_id ключ зависит только от него и sensor_id, иначе —
+    от названия, температуры, влажности и timestamp. Без timestamp
+    одинаковые показания одного датчика считаются одним событием.
+    """
+    client_id = item.get(CLIENT_ID_FIELD)
+    if client_id is not None:
+        parts = ["id", sensor_id, client_id]
+    else:
+        parts = [
+            "content",
+            sensor_id,
+            item.get("name"),
+            _canonical(item.get("temperature")),
+            _canonical(item.get("humidity")),
+            item.get(CLIENT_TIME_FIELD),
+        ]
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return uuid.UUID(bytes=hashlib.sha256(data.encode()).digest()[:16])
+
+
+def claim_keys(keys, created_at):
+    """
+    Записывает ключи и возвращает множество тех, которых ещё не было.
+
+    Вызывается в транзакции записи событий: при её откате ключи откатываются
+    вместе с событиями. Параллельный импорт с тем же ключом ждёт фиксации
+    этой транзакции и получает дубликат.
+    """
+    # Ключи пишутся по порядку: иначе два импорта с общими ключами в разном
+    # порядке ждали бы незафиксированных ключей друг друга — взаимоблокировка.
+    keys = sorted(set(keys))
+    if not keys:
+        return set()
+    quote = connection.ops.quote_name
+    key_field = EventKey._meta.get_field("key")
+    time_field = EventKey._meta.get_field("created_at")
+    created_at = time_field.get_db_prep_value(created_at, connection)
+    batch_size = connection.ops.bulk_batch_size([key_field, time_field], keys) or len(keys)
+    claimed = set()
+    with connection.cursor() as cursor:
+        for offset in range(0, len(keys), batch_size):
+            end = offset + batch_size
+            chunk = keys[offset:end]
+            params = []
+            for key in chunk:
+                params += [key_field.get_db_prep_value(key, connection), created_at]
+            cursor.execute(
+                f"INSERT INTO {quote(EventKey._meta.db_table)} "
+                f"({quote(key_field.column)}, {quote(time_field.column)}) "
+                f"VALUES {', '.join(['(%s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({quote(key_field.column)}) DO NOTHING "
+                f"RETURNING {quote(key_field.column)}",
+                params,
+            )
+            claimed.update(key_field.to_python(row[0]) for row in cursor.fetchall())
+    return claimed
+
+
+def skip_duplicates(rows, created_at):
+    """
+    Делит принятые события (sensor_id, данные, ключ) на новые — пары
+    (sensor_id, данные) — и дубликаты (sensor_id, ключ), в том числе
+    повторы внутри самого пакета.
+    """
+    new_keys = claim_keys([key for _, _, key in rows], created_at)
+    fresh, duplicates = [], []
+    for sensor_id, cleaned, key in rows:
+        if key in new_keys:
+            new_keys.discard(key)
+            fresh.append((sensor_id, cleaned))
+        else:
+            duplicates.append((sensor_id, key))
+    return fresh, duplicates
+
+
+def prune_keys(before):
+    """Удаляет ключи событий, записанных раньше before; возвращает их число."""
+    deleted, _ = EventKey.objects.filter(created_at__lt=before).delete()
+    return deleted
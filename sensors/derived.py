@@ -0,0 +1,41 @@
+"""
+Таблицы, производные от событий: сводки EventRollup и последние значения
+SensorLatest. Все пути записи событий (импорт, API, админка) сообщают о
+записанных и изменённых событиях через эти функции в той же транзакции.
+Они же сбрасывают кэш ответов API, зависящих от событий.
+"""
+
+from sensors.aggregates import add_events_to_rollups, add_to_rollups, refresh_rollups
+from sensors.cache import invalidate_responses
+from sensors.latest import refresh_latest, update_latest, upsert_latest
+
+
+def record_new_events(events):
+    """Новые события (экземпляры Event с id и created_at)."""
+    add_events_to_rollups(events)
+    update_latest(events)
+    invalidate_responses("event")
+
+
+def record_new_rows(rows):
+    """
+    Новые события без экземпляров модели (COPY): кортежи в порядке
+    COPY_FIELDS — (id, sensor_id, name, temperature, humidity, created_at).
+    """
+    add_to_rollups(
+        (sensor_id, created_at, temperature, humidity)
+        for _, sensor_id, _, temperature, humidity, created_at in rows
+    )
+    upsert_latest(
+        (sensor_id, event_id, name, temperature, humidity, created_at)
+        for event_id, sensor_id, name, temperature, humidity, created_at in rows
+    )
+    invalidate_responses("event")
+
+
+def record_changed_events(keys):
+    """Изменённые или удалённые события: пары (sensor_id, created_at) до и после."""
+    keys = list(keys)
+    refresh_rollups(keys)
+    refresh_latest(sensor_id for sensor_id, _ in keys)
+    invalidate_responses("event")
@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from json import JSONEncoder
+
+EXPORT_FIELDS = ("id", "sensor_id", "name", "temperature", "humidity", "created_at")
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "columnar": ("application/octet-stream", "bcol"),
+}
+
+# Колоночный формат: (имя, dtype NumPy, может ли быть NULL, код типа array).
+# Все столбцы по 8 байт, и каждая секция выровнена на 8 байт, поэтому
+# np.frombuffer читает их без копирования.
+COLUMNAR_MAGIC = b"BOLIDCOL"
+COLUMNAR_COLUMNS = (
+    ("sensor_id", "<i8", False, "q"),
+    ("created_at", "<M8[us]", False, "q"),
+    ("temperature", "<f8", True, "d"),
+    ("humidity", "<f8", True, "d"),
+)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def export_rows(queryset, chunk_size, fields=EXPORT_FIELDS):
+    """
+    Строки событий для выгрузки кортежами в порядке fields.
+
+    iterator() на PostgreSQL читает через именованный серверный курсор по
+    chunk_size строк, поэтому в памяти не бывает больше одной пачки.
+    """
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def csv_chunks(rows, chunk_size):
+    """CSV с заголовком; created_at — ISO 8601, пустые значения — пустые ячейки."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for *values, created_at in rows:
+        writer.writerow((*values, created_at.isoformat()))
+        count += 1
+        if count == chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, chunk_size):
+    """JSON Lines: по объекту с полями EXPORT_FIELDS на строку."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    lines = []
+    for *values, created_at in rows:
+        lines.append(
+            encoder.encode(dict(zip(EXPORT_FIELDS, (*values, created_at.isoformat()))))
+        )
+        if len(lines) == chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _padding(size):
+    return b"\0" * (-size % 8)
+
+
+def _column_bytes(typecode, values):
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _null_bitmap(values):
+    """Битовая маска непустых значений (бит i — строка i, младший бит первым)."""
+    bitmap = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value is not None:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap) + _padding(len(bitmap))
+
+
+def columnar_header():
+    schema = {
+        "version": 1,
+        "columns": [
+            {"name": name, "dtype": dtype, "nullable": nullable}
+            for name, dtype, nullable, _ in COLUMNAR_COLUMNS
+        ],
+    }
+    encoded = json.dumps(schema).encode("ascii")
+    encoded += b" " * (-len(encoded) % 8)
+    return COLUMNAR_MAGIC + struct.pack("<II", len(encoded), 0) + encoded
+
+
+def columnar_block(rows):
+    """
+    Блок из строк (sensor_id, created_at, temperature, humidity).
+
+    Формат: число строк (uint64), затем по очереди столбцы COLUMNAR_COLUMNS;
+    перед значениями столбца, который может быть NULL, идёт битовая маска
+    непустых значений, дополненная до 8 байт. На месте NULL записан NaN.
+    """
+    sensor_ids, created, temperatures, humidities = zip(*rows)
+    parts = [
+        struct.pack("<Q", len(rows)),
+        _column_bytes("q", sensor_ids),
+        _column_bytes("q", [(moment - EPOCH) // MICROSECOND for moment in created]),
+    ]
+    for values in (temperatures, humidities):
+        parts.append(_null_bitmap(values))
+        parts.append(
+            _column_bytes("d", [math.nan if value is None else value for value in values])
+        )
+    return b"".join(parts)
+
+
+def columnar_chunks(rows, chunk_size):
+    """
+    Колоночная выгрузка: заголовок и блоки по chunk_size строк.
+
+    Заголовок — COLUMNAR_MAGIC, длина схемы (uint32) и 4 нулевых байта,
+    затем схема в JSON, дополненная пробелами до 8 байт. Поток
+    заканчивается блоком из нуля строк.
+    """
+    yield columnar_header()
+    while True:
+        block = list(islice(rows, chunk_size))
+        if not block:
+            break
+        yield columnar_block(block)
+    yield struct.pack("<Q", 0)
+
+
+def read_columnar(data):
+    """
+    Разбирает колоночную выгрузку без NumPy: словарь столбцов-списков, NULL —
+    None, created_at — datetime в UTC.
+
+    С NumPy столбцы читаются без копирования:
+    np.frombuffer(data, dtype, count=rows, offset=offset).
+    """
+    if data[:8] != COLUMNAR_MAGIC:
+        raise ValueError("Неизвестный формат выгрузки")
+    (length,) = struct.unpack_from("<I", data, 8)
+    offset = 16 + length
+    schema = json.loads(data[16:offset])
+    columns = {column["name"]: [] for column in schema["columns"]}
+    while True:
+        (rows,) = struct.unpack_from("<Q", data, offset)
+        offset += 8
+        if not rows:
+            return columns
+        for column in schema["columns"]:
+            valid = None
+            if column["nullable"]:
+                size = (rows + 7) // 8
+                end = offset + size
+                valid = data[offset:end]
+                offset = end + (-size % 8)
+            kind = "d" if column["dtype"] == "<f8" else "q"
+            values = struct.unpack_from(f"<{rows}{kind}", data, offset)
+            offset += 8 * rows
+            if column["dtype"] == "<M8[us]":
+                values = [EPOCH + value * MICROSECOND for value in values]
+            if valid is not None:
+                values = [
+                    value if valid[i >> 3] >> (i & 7) & 1 else None
+                    for i, value in enumerate(values)
+                ]
+            columns[column["name"]].extend(values)
+
+
+def gzip_chunks(chunks):
+    """Сжимает поток частей в gzip на лету, не собирая его целиком."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_events(queryset, output, compress=False, chunk_size=2000):
+    """Поток частей выгрузки событий queryset в формате output (см. EXPORT_FORMATS)."""
+    if output == "columnar":
+        fields = [name for name, *_ in COLUMNAR_COLUMNS]
+        chunks = columnar_chunks(export_rows(queryset, chunk_size, fields), chunk_size)
+    elif output == "csv":
+        chunks = csv_chunks(export_rows(queryset, chunk_size), chunk_size)
+    else:
+        chunks = ndjson_chunks(export_rows(queryset, chunk_size), chunk_size)
+    return gzip_chunks(chunks) if compress else chunks
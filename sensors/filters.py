@@ -1,4 +1,4 @@
-from django_filters.rest_framework import FilterSet, NumberFilter
+from django_filters.rest_framework import FilterSet, IsoDateTimeFilter, NumberFilter
 from rest_framework.exceptions import ValidationError
 
 from .models import Event
@@ -17,12 +17,22 @@ class EventFilter(FilterSet):
     humidity_max = NumberFilter(
         field_name="humidity", lookup_expr="lte", label="Maximal Humidity"
     )
+    created_from = IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte", label="Created at or after (ISO 8601)"
+    )
+    created_to = IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt", label="Created before (ISO 8601)"
+    )
 
     class Meta:
         model = Event
         fields = ["sensor_id", "temperature", "humidity"]
 
-    def filter_queryset(self, queryset):
+    def validate_ranges(self):
+        """
+        Проверяет, что границы диапазонов не перепутаны. Вызывается и для
+        агрегатов из сводок, которые не строят queryset событий.
+        """
         temp_min = self.data.get("temperature_min")
         temp_max = self.data.get("temperature_max")
         if temp_min and temp_max and float(temp_max) < float(temp_min):
@@ -31,4 +41,26 @@ class EventFilter(FilterSet):
         humi_max = self.data.get("humidity_max")
         if humi_min and humi_max and float(humi_max) < float(humi_min):
             raise ValidationError("humidity_max не может быть меньше humidity_min")
+        created_from = self.form.cleaned_data.get("created_from")
+        created_to = self.form.cleaned_data.get("created_to")
+        if created_from and created_to and created_to < created_from:
+            raise ValidationError("created_to не может быть раньше created_from")
+
+    def filter_queryset(self, queryset):
+        self.validate_ranges()
         return super().filter_queryset(queryset)
+
+
+class SensorEventFilter(FilterSet):
+    """Окно по времени для событий одного датчика (/sensors/{id}/events/)."""
+
+    since = IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte", label="Created at or after (ISO 8601)"
+    )
+    until = IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt", label="Created before (ISO 8601)"
+    )
+
+    class Meta:
+        model = Event
+        fields = ["since", "until"]
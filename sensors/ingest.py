@@ -0,0 +1,184 @@
+"""
+Буфер одиночных событий POST /events/: запись пакетами вместо транзакции
+на каждый запрос.
+
+Событие проверяется сериализатором сразу, а в БД попадает вместе с
+событиями параллельных запросов одним bulk_create. Первый запрос пакета
+становится ведущим: он ждёт до EVENTS_INGEST_MAX_DELAY секунд (или пока
+пакет не наберёт EVENTS_INGEST_MAX_BATCH событий) и записывает пакет в
+своём потоке, поэтому фоновых потоков и отдельных подключений к БД нет.
+Пакеты процесса пишутся по одному: пока идёт запись, следующий пакет
+продолжает набираться, а не спорит с ней за строки сводок и последних
+значений.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from sensors.derived import record_new_events
+from sensors.models import Event
+
+logger = logging.getLogger(__name__)
+
+# По скольким последним пакетам считаются перцентили размера и задержки.
+STATS_WINDOW = 1000
+
+
+def save_event(event):
+    """Записывает одно событие в своей транзакции, без буфера."""
+    with transaction.atomic():
+        event.save()
+        record_new_events([event])
+
+
+class _Batch:
+    """Набираемый пакет: события, ошибки их записи по индексу и флаг записи."""
+
+    def __init__(self):
+        self.events = []
+        self.errors = {}
+        self.flushed = threading.Event()
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "avg": round(sum(values) / len(values), 3),
+        "p50": values[(len(values) - 1) // 2],
+        "p99": values[int((len(values) - 1) * 0.99)],
+        "max": values[-1],
+    }
+
+
+class IngestBuffer:
+    """
+    Буфер событий с записью пакетами.
+
+    С durable=True запрос возвращается только после записи своего пакета
+    (и получает id события или ошибку записи); иначе — сразу, а событие
+    запишет ведущий запрос пакета через несколько миллисекунд. Ошибки
+    записи таких событий только логируются.
+    """
+
+    def __init__(self, max_size, max_delay, durable=True):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.durable = durable
+        self.lock = threading.Lock()
+        self.closed = threading.Condition(self.lock)
+        self.flushing = threading.Lock()
+        self.batch = None
+        self.counters = {"batches": 0, "events": 0, "failed": 0}
+        self.recent = deque(maxlen=STATS_WINDOW)
+        self.stats_lock = threading.Lock()
+
+    def add(self, event, concurrent=True):
+        """
+        Добавляет проверенное событие (экземпляр Event без id) в пакет.
+
+        concurrent=False — процесс обслуживает запросы по одному (sync-воркер
+        Gunicorn): ждать другие события бессмысленно, пакет пишется сразу.
+        """
+        with self.lock:
+            batch = self.batch
+            leader = batch is None
+            if leader:
+                batch = self.batch = _Batch()
+            index = len(batch.events)
+            batch.events.append(event)
+            if len(batch.events) >= self.max_size:
+                self.batch = None
+                self.closed.notify_all()
+            elif leader and concurrent:
+                deadline = time.monotonic() + self.max_delay
+                while self.batch is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.closed.wait(remaining)
+
+        if leader:
+            with self.flushing:
+                with self.lock:
+                    if self.batch is batch:
+                        self.batch = None
+                self.flush(batch)
+        elif self.durable:
+            batch.flushed.wait()
+        if self.durable and index in batch.errors:
+            raise batch.errors[index]
+
+    def flush(self, batch):
+        started = time.perf_counter()
+        try:
+            self._write(batch)
+        except Exception as e:
+            logger.exception("Ошибка записи пакета событий из буфера")
+            batch.errors = dict.fromkeys(range(len(batch.events)), e)
+        finally:
+            elapsed = time.perf_counter() - started
+            batch.flushed.set()
+            with self.stats_lock:
+                self.counters["batches"] += 1
+                self.counters["events"] += len(batch.events)
+                self.counters["failed"] += len(batch.errors)
+                self.recent.append((len(batch.events), round(elapsed * 1000, 3)))
+
+    def _write(self, batch):
+        try:
+            with transaction.atomic():
+                Event.objects.bulk_create(batch.events)
+                record_new_events(batch.events)
+            return
+        except DatabaseError:
+            logger.exception("Ошибка пакетной записи буфера, события пишутся по одному")
+        # Например, датчик удалили между проверкой события и записью пакета.
+        for index, event in enumerate(batch.events):
+            try:
+                save_event(event)
+            except DatabaseError as e:
+                logger.exception(
+                    f"Ошибка при добавлении события для sensor_id={event.sensor_id_id}"
+                )
+                batch.errors[index] = e
+
+    def stats(self):
+        """Счётчики и перцентили размера пакета и времени записи (мс)."""
+        with self.stats_lock:
+            counters = dict(self.counters)
+            recent = list(self.recent)
+        return {
+            **counters,
+            "max_batch_size": self.max_size,
+            "max_delay_ms": self.max_delay * 1000,
+            "durable": self.durable,
+            "batch_size": _percentiles([size for size, _ in recent]),
+            "flush_ms": _percentiles([elapsed for _, elapsed in recent]),
+        }
+
+
+_buffer = None
+_buffer_config = None
+
+
+def get_ingest_buffer():
+    """Буфер по текущим настройкам или None, если запись пакетами выключена."""
+    global _buffer, _buffer_config
+    config = (
+        settings.EVENTS_INGEST_BUFFER,
+        settings.EVENTS_INGEST_MAX_BATCH,
+        settings.EVENTS_INGEST_MAX_DELAY,
+        settings.EVENTS_INGEST_DURABLE,
+    )
+    if config != _buffer_config:
+        enabled, max_size, max_delay, durable = config
+        _buffer = IngestBuffer(max_size, max_delay, durable) if enabled else None
+        _buffer_config = config
+    return _buffer
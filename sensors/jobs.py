@@ -0,0 +1,167 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from sensors.models import ImportJob, ImportJobFailure
+from sensors.uploads import expire_upload_sessions, iter_upload
+from sensors.utils import ImportReport, import_events_from_json, import_events_from_stream
+
+logger = logging.getLogger(__name__)
+
+
+class JobImportReport(ImportReport):
+    """
+    Отчёт импорта, который пишет прогресс и ошибки в ImportJob.
+
+    id импортированных событий не копятся — для задачи важны только
+    счётчики. Ошибки и счётчики сбрасываются в БД не чаще раза в
+    IMPORT_JOB_PROGRESS_INTERVAL секунд и в конце импорта.
+    """
+
+    def __init__(self, job):
+        super().__init__(limit=0)
+        self.job = job
+        self.pending_failures = []
+        self.flushed_at = time.monotonic()
+
+    def add_imported(self, event_id):
+        super().add_imported(event_id)
+        self._maybe_flush()
+
+    def add_duplicate(self, sensor_id, key):
+        super().add_duplicate(sensor_id, key)
+        self._maybe_flush()
+
+    def add_failed(self, sensor_id, error):
+        self.failed_count += 1
+        self.pending_failures.append(
+            ImportJobFailure(job=self.job, sensor_id=sensor_id, error=error)
+        )
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self.flushed_at >= settings.IMPORT_JOB_PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        ImportJobFailure.objects.bulk_create(self.pending_failures)
+        self.pending_failures = []
+        self.job.imported_count = self.imported_count
+        self.job.failed_count = self.failed_count
+        self.job.duplicate_count = self.duplicate_count
+        self.job.bytes_read = self.bytes_read or self.job.bytes_read
+        self.job.save(
+            update_fields=[
+                "imported_count",
+                "failed_count",
+                "duplicate_count",
+                "bytes_read",
+                "updated_at",
+            ]
+        )
+        self.flushed_at = time.monotonic()
+
+
+def enqueue_import(chunks, engine=None, dedup=False):
+    """
+    Сохраняет загружаемые данные на диск и ставит задачу импорта в очередь.
+
+    chunks — итератор байтовых кусков (UploadedFile.chunks() или тело запроса);
+    сжатие и формат воркер определит сам по содержимому файла.
+    """
+    jobs_dir = settings.IMPORT_JOBS_DIR
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+    path = jobs_dir / f"{uuid.uuid4().hex}.upload"
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return ImportJob.objects.create(
+        file_path=str(path),
+        engine=engine or "",
+        dedup=dedup,
+        file_size=path.stat().st_size,
+    )
+
+
+def claim_next_job():
+    """
+    Забирает из очереди самую старую задачу.
+
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет нескольким воркерам разбирать
+    одну очередь, не получая одну и ту же задачу дважды.
+    """
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImportJob.PENDING)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+    return job
+
+
+def run_job(job):
+    report = JobImportReport(job)
+    options = {"engine": job.engine or None, "report": report, "dedup": job.dedup}
+    try:
+        if job.upload is not None:
+            # Файл ещё может загружаться: части разбираются по мере поступления,
+            # а пока их нет, прогресс задачи обновляется, чтобы её не сочли зависшей.
+            chunks = iter_upload(job.upload, on_wait=report.flush)
+            import_events_from_stream(chunks, **options)
+            job.refresh_from_db(fields=["file_size"])
+        else:
+            import_events_from_json(job.file_path, **options)
+    except Exception as e:
+        logger.exception(f"Задача импорта {job.id} завершилась с ошибкой")
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+    else:
+        job.status = ImportJob.DONE
+        job.bytes_read = job.file_size
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "bytes_read", "finished_at", "updated_at"])
+    Path(job.file_path).unlink(missing_ok=True)
+    return job
+
+
+def fail_stale_jobs():
+    """
+    Помечает ошибкой задачи, воркер которых перестал обновлять прогресс.
+
+    Перезапускать такие задачи нельзя: часть событий уже записана, и
+    повторный импорт файла без dedup задублировал бы их.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_TIMEOUT)
+    return ImportJob.objects.filter(
+        status=ImportJob.RUNNING, updated_at__lt=stale_before
+    ).update(
+        status=ImportJob.FAILED,
+        error="Воркер импорта перестал отвечать",
+        finished_at=timezone.now(),
+    )
+
+
+def run_worker(poll_interval=1.0, once=False):
+    """Цикл воркера: выполняет задачи из очереди, пока не будет остановлен."""
+    while True:
+        fail_stale_jobs()
+        expire_upload_sessions()
+        job = claim_next_job()
+        if job is not None:
+            run_job(job)
+        elif once:
+            return
+        else:
+            time.sleep(poll_interval)
@@ -0,0 +1,89 @@
+from django.db import connection
+
+from sensors.models import Event, SensorLatest
+
+LATEST_COLUMNS = ("event_id", "name", "temperature", "humidity", "created_at")
+
+
+def _upsert_sql(rows):
+    """
+    INSERT ... ON CONFLICT DO UPDATE, заменяющий строку, только если событие новее.
+
+    Порядок событий — по (created_at, event_id), как у пагинации событий;
+    условие записано через OR, чтобы синтаксис подходил и SQLite.
+    """
+    quote = connection.ops.quote_name
+    table = quote(SensorLatest._meta.db_table)
+    created_at, event_id = quote("created_at"), quote("event_id")
+    columns = ", ".join(quote(c) for c in ("sensor_id", *LATEST_COLUMNS))
+    placeholders = "(" + ", ".join(["%s"] * (1 + len(LATEST_COLUMNS))) + ")"
+    updates = ", ".join(f"{quote(c)} = EXCLUDED.{quote(c)}" for c in LATEST_COLUMNS)
+    return (
+        f"INSERT INTO {table} ({columns}) VALUES {', '.join([placeholders] * rows)} "
+        f"ON CONFLICT ({quote('sensor_id')}) DO UPDATE SET {updates} "
+        f"WHERE EXCLUDED.{created_at} > {table}.{created_at} "
+        f"OR (EXCLUDED.{created_at} = {table}.{created_at} "
+        f"AND EXCLUDED.{event_id} > {table}.{event_id})"
+    )
+
+
+def upsert_latest(rows):
+    """
+    Обновляет последние события датчиков по только что записанным событиям.
+
+    rows — кортежи (sensor_id, event_id, name, temperature, humidity,
+    created_at). В один upsert попадает только самое новое событие каждого
+    датчика; датчики сортируются, чтобы параллельные импорты блокировали
+    строки в одном порядке.
+    """
+    newest = {}
+    for row in rows:
+        current = newest.get(row[0])
+        if current is None or (row[5], row[1]) > (current[5], current[1]):
+            newest[row[0]] = row
+    if not newest:
+        return
+
+    adapt = connection.ops.adapt_datetimefield_value
+    params = [[*row[:5], adapt(row[5])] for _, row in sorted(newest.items())]
+    batch_size = (connection.features.max_query_params or 6000) // len(params[0])
+    with connection.cursor() as cursor:
+        for offset in range(0, len(params), batch_size):
+            end = offset + batch_size
+            batch = params[offset:end]
+            cursor.execute(_upsert_sql(len(batch)), [p for row in batch for p in row])
+
+
+def update_latest(events):
+    upsert_latest(
+        (e.sensor_id_id, e.id, e.name, e.temperature, e.humidity, e.created_at)
+        for e in events
+    )
+
+
+def refresh_latest(sensor_ids):
+    """
+    Заново находит последнее событие датчиков после правки или удаления.
+
+    Поиск идёт по индексу (sensor_id, created_at) — по одному короткому
+    запросу на датчик.
+    """
+    for sensor_id in set(sensor_ids):
+        event = (
+            Event.objects.filter(sensor_id=sensor_id)
+            .order_by("-created_at", "-id")
+            .first()
+        )
+        if event is None:
+            SensorLatest.objects.filter(sensor_id=sensor_id).delete()
+            continue
+        SensorLatest.objects.update_or_create(
+            sensor_id=sensor_id,
+            defaults={
+                "event_id": event.id,
+                "name": event.name,
+                "temperature": event.temperature,
+                "humidity": event.humidity,
+                "created_at": event.created_at,
+            },
+        )
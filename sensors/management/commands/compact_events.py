@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+
+from sensors.models import Event
+from sensors.retention import compact_events, retention_policies
+
+
+class Command(BaseCommand):
+    help = (
+        "Сворачивает устаревшие события в сводки и удаляет их "
+        "по политикам хранения EVENTS_RETENTION_DAYS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="Событий в одной транзакции")
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Пауза между пачками удаления, секунд",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="После удаления выполнить VACUUM (ANALYZE) таблицы событий",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать, сколько событий устарело",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            for scope, sensor_ids, cutoff in retention_policies():
+                stats = Event.objects.filter(
+                    sensor_id__in=sensor_ids, created_at__lt=cutoff
+                ).aggregate(count=Count("id"), oldest=Min("created_at"))
+                self.stdout.write(
+                    f"Политика {scope}: до {cutoff:%Y-%m-%d} устарело событий "
+                    f"{stats['count']}, самое старое {stats['oldest'] or '—'}"
+                )
+            return
+
+        report = compact_events(
+            chunk_size=options["chunk_size"],
+            pause=options["pause"],
+            vacuum=options["vacuum"],
+        )
+        for scope, result in report["policies"].items():
+            self.stdout.write(
+                f"Политика {scope}: до {result['cutoff']:%Y-%m-%d} удалено событий "
+                f"{result['deleted']}, {result['bytes']} байт"
+            )
+        for name, size in report["partitions"]:
+            self.stdout.write(f"Удалена секция {name}, {size} байт")
+        self.stdout.write(
+            f"Удалено событий построчно: {report['deleted']}, "
+            f"освобождено байт: {report['bytes']}"
+        )
+        if report["keys"]:
+            self.stdout.write(f"Удалено ключей импорта: {report['keys']}")
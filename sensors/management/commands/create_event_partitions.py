@@ -0,0 +1,36 @@
+from datetime import datetime, time, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from sensors.partitions import create_partitions, drop_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Создаёт месячные секции таблицы событий заранее и удаляет устаревшие"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="На сколько месяцев вперёд создать секции (по умолчанию 3)",
+        )
+        parser.add_argument(
+            "--drop-before",
+            help="Удалить секции, целиком лежащие раньше даты (YYYY-MM-DD)",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("Таблица событий не секционирована (нужен PostgreSQL).")
+        for name in create_partitions(options["months"]):
+            self.stdout.write(f"Создана секция {name}")
+
+        if options["drop_before"]:
+            day = parse_date(options["drop_before"])
+            if day is None:
+                raise CommandError(f"Некорректная дата: {options['drop_before']}")
+            before = datetime.combine(day, time.min, tzinfo=timezone.utc)
+            for name, size in drop_partitions(before):
+                self.stdout.write(f"Удалена секция {name}, освобождено {size} байт")
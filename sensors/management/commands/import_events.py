@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sensors.sharding import import_events_sharded
+from sensors.utils import IMPORT_ENGINES, EventImportError, import_events_from_json
+
+
+class Command(BaseCommand):
+    help = "Импортирует события из JSON-файла (массив объектов или JSON Lines)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к JSON-файлу")
+        parser.add_argument(
+            "--engine",
+            choices=IMPORT_ENGINES,
+            default="copy",
+            help="Способ записи (по умолчанию copy, на SQLite — batch)",
+        )
+        parser.add_argument("--batch-size", type=int, help="Размер пакета")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число процессов: файл делится на части, каждая импортируется отдельно",
+        )
+        parser.add_argument(
+            "--dedup",
+            action="store_true",
+            help="Пропускать уже импортированные события (по event_id или содержимому)",
+        )
+
+    def handle(self, *args, **options):
+        import_options = {
+            "engine": options["engine"],
+            "batch_size": options["batch_size"],
+            "dedup": options["dedup"],
+        }
+        try:
+            if options["workers"] > 1:
+                result = import_events_sharded(
+                    options["path"], options["workers"], **import_options
+                )
+            else:
+                result = import_events_from_json(options["path"], **import_options)
+        except (FileNotFoundError, EventImportError) as e:
+            raise CommandError(str(e)) from e
+
+        if options["verbosity"] >= 2:
+            for failed in result["failed"]:
+                self.stderr.write(f"sensor_id={failed['sensor_id']}: {failed['error']}")
+        imported = result.get("imported_count", len(result["imported"]))
+        failed = result.get("failed_count", len(result["failed"]))
+        message = f"Импортировано событий: {imported}, с ошибками: {failed}"
+        if options["dedup"]:
+            duplicates = result.get("duplicate_count", len(result["duplicates"]))
+            message += f", дубликатов пропущено: {duplicates}"
+        self.stdout.write(self.style.SUCCESS(message))
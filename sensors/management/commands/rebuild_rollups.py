@@ -0,0 +1,37 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from sensors.aggregates import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Заново строит минутные, часовые и суточные сводки событий"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sensor",
+            type=int,
+            action="append",
+            dest="sensors",
+            help="Перестроить только сводки датчика (можно указать несколько раз)",
+        )
+        parser.add_argument(
+            "--since",
+            help="Перестроить сводки начиная с даты или момента времени (ISO 8601)",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None and parse_date(options["since"]):
+                since = datetime.combine(parse_date(options["since"]), time.min)
+            if since is None:
+                raise CommandError(f"Некорректная дата: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        created = rebuild_rollups(sensor_ids=options["sensors"], since=since)
+        self.stdout.write(f"Создано сводок: {created}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from sensors.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи импорта событий из очереди в БД"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза между проверками пустой очереди, секунд",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить задачи, уже стоящие в очереди, и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        run_worker(poll_interval=options["poll_interval"], once=options["once"])
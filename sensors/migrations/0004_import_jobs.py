@@ -0,0 +1,138 @@
+# Generated by Django 4.2.24 on 2026-10-18 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0003_alter_event_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Завершена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        help_text="Статус задачи",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "file_path",
+                    models.CharField(
+                        help_text="Путь к сохранённому файлу", max_length=500
+                    ),
+                ),
+                (
+                    "engine",
+                    models.CharField(blank=True, help_text="Способ записи", max_length=16),
+                ),
+                (
+                    "file_size",
+                    models.BigIntegerField(default=0, help_text="Размер файла, байт"),
+                ),
+                (
+                    "bytes_read",
+                    models.BigIntegerField(default=0, help_text="Прочитано байт файла"),
+                ),
+                (
+                    "imported_count",
+                    models.IntegerField(default=0, help_text="Импортировано событий"),
+                ),
+                (
+                    "failed_count",
+                    models.IntegerField(default=0, help_text="Событий с ошибками"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, help_text="Ошибка, прервавшая импорт"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, help_text="Время постановки"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(blank=True, help_text="Время запуска", null=True),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, help_text="Время завершения", null=True
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="Время последнего обновления прогресса"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача импорта",
+                "verbose_name_plural": "Задачи импорта",
+                "db_table": "Задачи импорта",
+            },
+        ),
+        migrations.CreateModel(
+            name="ImportJobFailure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sensor_id",
+                    models.JSONField(
+                        help_text="sensor_id события, как в файле", null=True
+                    ),
+                ),
+                ("error", models.TextField(help_text="Текст ошибки")),
+                (
+                    "job",
+                    models.ForeignKey(
+                        help_text="Задача импорта",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="failures",
+                        to="sensors.importjob",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ошибка импорта",
+                "verbose_name_plural": "Ошибки импорта",
+                "db_table": "Ошибки импорта",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="importjob",
+            index=models.Index(
+                fields=["status", "id"], name="Задачи импо_status_31ce00_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.24 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0004_import_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("1m", "Минута"), ("1h", "Час"), ("1d", "Сутки")],
+                        help_text="Размер интервала",
+                        max_length=2,
+                    ),
+                ),
+                ("start", models.DateTimeField(help_text="Начало интервала")),
+                ("events", models.BigIntegerField(default=0, help_text="Число событий")),
+                ("count_temperature", models.BigIntegerField(default=0)),
+                ("sum_temperature", models.FloatField(null=True)),
+                ("min_temperature", models.FloatField(null=True)),
+                ("max_temperature", models.FloatField(null=True)),
+                ("count_humidity", models.BigIntegerField(default=0)),
+                ("sum_humidity", models.FloatField(null=True)),
+                ("min_humidity", models.FloatField(null=True)),
+                ("max_humidity", models.FloatField(null=True)),
+                (
+                    "sensor",
+                    models.ForeignKey(
+                        help_text="Сенсор",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="sensors.sensor",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сводка событий",
+                "verbose_name_plural": "Сводки событий",
+                "db_table": "Сводки событий",
+                "indexes": [
+                    models.Index(
+                        fields=["granularity", "start"],
+                        name="Сводки собы_granula_102094_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="eventrollup",
+            constraint=models.UniqueConstraint(
+                fields=("sensor", "granularity", "start"), name="unique_event_rollup"
+            ),
+        ),
+    ]
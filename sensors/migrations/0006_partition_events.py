@@ -0,0 +1,114 @@
+"""
+Секционирование таблицы "События" по created_at (только PostgreSQL).
+
+Старая таблица переименовывается, вместо неё создаётся секционированная
+RANGE (created_at) с месячными секциями (по UTC) и секцией по умолчанию,
+данные переносятся, после чего заново создаются первичный ключ
+(id, created_at), внешние ключи и индексы старой таблицы. Identity-столбец в
+секционированной таблице до PostgreSQL 17 не поддерживается, поэтому id
+получает значения из обычной последовательности, принадлежащей столбцу.
+
+Перенос идёт одной транзакцией под эксклюзивной блокировкой: на большой
+таблице миграцию нужно запускать в окно обслуживания. На других СУБД
+миграция ничего не делает.
+"""
+
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+TABLE = "События"
+MONTHS_AHEAD = 3
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _next_month(start):
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def _table_definition(cursor, table):
+    """Индексы (кроме первичного ключа) и внешние ключи таблицы."""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass "
+        "AND contype = 'p')",
+        [table, _quote(table)],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [_quote(table)],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _create_partitions(cursor, table, old):
+    cursor.execute(f"SELECT min(created_at) FROM {old}")
+    now = datetime.now(timezone.utc)
+    first = min(cursor.fetchone()[0] or now, now).astimezone(timezone.utc)
+    start = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while start <= last:
+        end = _next_month(start)
+        cursor.execute(
+            f"CREATE TABLE {_quote(f'{TABLE}_{start:%Y_%m}')} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    cursor.execute(f"CREATE TABLE {_quote(f'{TABLE}_default')} PARTITION OF {table} DEFAULT")
+
+
+def _rebuild(cursor, partitioned):
+    table = _quote(TABLE)
+    old = _quote(f"{TABLE}_old")
+    sequence = _quote(f"{TABLE}_id_seq")
+    indexes, foreign_keys = _table_definition(cursor, TABLE)
+
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    partition_by = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    cursor.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS){partition_by}")
+    # Последовательность старой таблицы удалится вместе с ней.
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    if partitioned:
+        _create_partitions(cursor, table, old)
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    cursor.execute(f"DROP TABLE {old}")
+
+    cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    cursor.execute(f"SELECT setval('{sequence}', coalesce(max(id), 0) + 1, false) FROM {table}")
+    primary_key = "id, created_at" if partitioned else "id"
+    cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})")
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {_quote(name)} {definition}")
+    for definition in indexes:
+        cursor.execute(definition)
+
+
+def partition_events(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        with schema_editor.connection.cursor() as cursor:
+            _rebuild(cursor, partitioned=True)
+
+
+def unpartition_events(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        with schema_editor.connection.cursor() as cursor:
+            _rebuild(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0005_event_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, unpartition_events),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.24 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0006_partition_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompactionState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        help_text="Тип датчика или * для остальных",
+                        max_length=16,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "rolled_up_until",
+                    models.DateTimeField(
+                        help_text="До какого момента свёрнуты события", null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Прогресс очистки событий",
+                "verbose_name_plural": "Прогресс очистки событий",
+                "db_table": "Прогресс очистки событий",
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.24 on 2026-10-18 06:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_latest(apps, schema_editor):
+    """Последнее событие каждого датчика по уже записанным событиям."""
+    Event = apps.get_model("sensors", "Event")
+    SensorLatest = apps.get_model("sensors", "SensorLatest")
+    Sensor = apps.get_model("sensors", "Sensor")
+    latest = []
+    for sensor_id in Sensor.objects.values_list("id", flat=True).iterator():
+        event = (
+            Event.objects.filter(sensor_id=sensor_id).order_by("-created_at", "-id").first()
+        )
+        if event is not None:
+            latest.append(
+                SensorLatest(
+                    sensor_id=sensor_id,
+                    event_id=event.id,
+                    name=event.name,
+                    temperature=event.temperature,
+                    humidity=event.humidity,
+                    created_at=event.created_at,
+                )
+            )
+    SensorLatest.objects.bulk_create(latest, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0007_compaction_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorLatest",
+            fields=[
+                (
+                    "sensor",
+                    models.OneToOneField(
+                        help_text="Сенсор",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest",
+                        serialize=False,
+                        to="sensors.sensor",
+                    ),
+                ),
+                ("event_id", models.IntegerField(help_text="ID последнего события")),
+                ("name", models.CharField(blank=True, max_length=50, null=True)),
+                ("temperature", models.FloatField(blank=True, null=True)),
+                ("humidity", models.FloatField(blank=True, null=True)),
+                (
+                    "created_at",
+                    models.DateTimeField(help_text="Дата и время последнего события"),
+                ),
+            ],
+            options={
+                "verbose_name": "Последнее событие датчика",
+                "verbose_name_plural": "Последние события датчиков",
+                "db_table": "Последние события",
+            },
+        ),
+        migrations.RunPython(fill_latest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.24 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0008_sensor_latest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="dedup",
+            field=models.BooleanField(
+                default=False, help_text="Пропускать дубликаты событий"
+            ),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="duplicate_count",
+            field=models.IntegerField(default=0, help_text="Пропущено дубликатов"),
+        ),
+        migrations.CreateModel(
+            name="EventKey",
+            fields=[
+                (
+                    "key",
+                    models.UUIDField(
+                        help_text="Ключ содержимого события",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(help_text="Когда событие с этим ключом записано"),
+                ),
+            ],
+            options={
+                "verbose_name": "Ключ события",
+                "verbose_name_plural": "Ключи событий",
+                "db_table": "Ключи событий",
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="Ключи событ_created_339c79_idx"
+                    )
+                ],
+            },
+        ),
+    ]
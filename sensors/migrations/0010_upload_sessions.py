@@ -0,0 +1,141 @@
+# Generated by Django 4.2.24 on 2026-10-18 07:13
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sensors", "0009_event_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "Загружается"), ("complete", "Загружена")],
+                        default="open",
+                        help_text="Статус загрузки",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "file_path",
+                    models.CharField(help_text="Путь к файлу загрузки", max_length=500),
+                ),
+                (
+                    "total_size",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Размер файла, байт, если известен заранее",
+                        null=True,
+                    ),
+                ),
+                (
+                    "received_size",
+                    models.BigIntegerField(
+                        default=0, help_text="Принято байт от начала файла без пропусков"
+                    ),
+                ),
+                (
+                    "engine",
+                    models.CharField(blank=True, help_text="Способ записи", max_length=16),
+                ),
+                (
+                    "dedup",
+                    models.BooleanField(
+                        default=False, help_text="Пропускать дубликаты событий"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, help_text="Время создания"),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(help_text="Когда незавершённая сессия удаляется"),
+                ),
+            ],
+            options={
+                "verbose_name": "Сессия загрузки",
+                "verbose_name_plural": "Сессии загрузки",
+                "db_table": "Сессии загрузки",
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at"], name="Сессии загр_expires_22f4b0_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="UploadChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField(help_text="Номер части")),
+                (
+                    "offset",
+                    models.BigIntegerField(help_text="Смещение части в файле, байт"),
+                ),
+                ("size", models.BigIntegerField(help_text="Размер части, байт")),
+                (
+                    "sha256",
+                    models.CharField(help_text="SHA-256 части, hex", max_length=64),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        help_text="Сессия загрузки",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="sensors.uploadsession",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Часть загрузки",
+                "verbose_name_plural": "Части загрузки",
+                "db_table": "Части загрузки",
+            },
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="upload",
+            field=models.OneToOneField(
+                blank=True,
+                help_text="Сессия загрузки, из которой импорт читает части по мере поступления",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="job",
+                to="sensors.uploadsession",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="uploadchunk",
+            constraint=models.UniqueConstraint(
+                fields=("session", "number"), name="unique_upload_chunk"
+            ),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models
 
@@ -108,3 +110,260 @@ class Event(models.Model):
             models.Index(fields=["temperature"]),
             models.Index(fields=["humidity"]),
         ]
+
+
+class ImportJob(models.Model):
+    """
+    Фоновая задача импорта событий из файла.
+
+    Очередь задач хранится прямо в БД: upload-json ставит задачу в статус
+    pending, а процесс manage.py run_import_worker забирает её и выполняет,
+    периодически обновляя счётчики прогресса.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Завершена"),
+        (FAILED, "Ошибка"),
+    ]
+
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING, help_text="Статус задачи"
+    )
+    file_path = models.CharField(max_length=500, help_text="Путь к сохранённому файлу")
+    engine = models.CharField(max_length=16, blank=True, help_text="Способ записи")
+    file_size = models.BigIntegerField(default=0, help_text="Размер файла, байт")
+    bytes_read = models.BigIntegerField(default=0, help_text="Прочитано байт файла")
+    imported_count = models.IntegerField(default=0, help_text="Импортировано событий")
+    failed_count = models.IntegerField(default=0, help_text="Событий с ошибками")
+    dedup = models.BooleanField(default=False, help_text="Пропускать дубликаты событий")
+    duplicate_count = models.IntegerField(default=0, help_text="Пропущено дубликатов")
+    upload = models.OneToOneField(
+        "UploadSession",
+        null=True,
+        blank=True,
+        related_name="job",
+        on_delete=models.SET_NULL,
+        help_text="Сессия загрузки, из которой импорт читает части по мере поступления",
+    )
+    error = models.TextField(blank=True, help_text="Ошибка, прервавшая импорт")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Время постановки")
+    started_at = models.DateTimeField(null=True, blank=True, help_text="Время запуска")
+    finished_at = models.DateTimeField(null=True, blank=True, help_text="Время завершения")
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="Время последнего обновления прогресса"
+    )
+
+    def __str__(self):
+        return f"Импорт {self.id}: {self.get_status_display()}."
+
+    class Meta:
+        db_table = "Задачи импорта"
+        verbose_name = "Задача импорта"
+        verbose_name_plural = "Задачи импорта"
+        indexes = [models.Index(fields=["status", "id"])]
+
+
+class ImportJobFailure(models.Model):
+    """Событие, не прошедшее импорт в рамках фоновой задачи."""
+
+    job = models.ForeignKey(
+        "ImportJob",
+        related_name="failures",
+        on_delete=models.CASCADE,
+        help_text="Задача импорта",
+    )
+    sensor_id = models.JSONField(null=True, help_text="sensor_id события, как в файле")
+    error = models.TextField(help_text="Текст ошибки")
+
+    class Meta:
+        db_table = "Ошибки импорта"
+        verbose_name = "Ошибка импорта"
+        verbose_name_plural = "Ошибки импорта"
+
+
+class EventRollup(models.Model):
+    """
+    Сводка событий датчика за минуту, час или сутки.
+
+    Хранит число событий и count/sum/min/max температуры и влажности, из
+    которых собираются агрегаты любого более крупного интервала. Обновляется
+    инкрементально при записи событий (sensors.aggregates).
+    """
+
+    GRANULARITY_CHOICES = [("1m", "Минута"), ("1h", "Час"), ("1d", "Сутки")]
+
+    sensor = models.ForeignKey(
+        "Sensor",
+        related_name="rollups",
+        on_delete=models.CASCADE,
+        help_text="Сенсор",
+    )
+    granularity = models.CharField(
+        max_length=2, choices=GRANULARITY_CHOICES, help_text="Размер интервала"
+    )
+    start = models.DateTimeField(help_text="Начало интервала")
+    events = models.BigIntegerField(default=0, help_text="Число событий")
+    count_temperature = models.BigIntegerField(default=0)
+    sum_temperature = models.FloatField(null=True)
+    min_temperature = models.FloatField(null=True)
+    max_temperature = models.FloatField(null=True)
+    count_humidity = models.BigIntegerField(default=0)
+    sum_humidity = models.FloatField(null=True)
+    min_humidity = models.FloatField(null=True)
+    max_humidity = models.FloatField(null=True)
+
+    class Meta:
+        db_table = "Сводки событий"
+        verbose_name = "Сводка событий"
+        verbose_name_plural = "Сводки событий"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sensor", "granularity", "start"], name="unique_event_rollup"
+            )
+        ]
+        indexes = [models.Index(fields=["granularity", "start"])]
+
+
+class CompactionState(models.Model):
+    """
+    Прогресс compact_events для одной политики хранения.
+
+    rolled_up_until — граница, до которой сводки уже перестроены по сырым
+    событиям. Прерванная очистка продолжает удаление без повторной сборки
+    сводок: пересобранные по остатку событий, они бы потеряли удалённое.
+    """
+
+    scope = models.CharField(
+        max_length=16, unique=True, help_text="Тип датчика или * для остальных"
+    )
+    rolled_up_until = models.DateTimeField(
+        null=True, help_text="До какого момента свёрнуты события"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "Прогресс очистки событий"
+        verbose_name = "Прогресс очистки событий"
+        verbose_name_plural = "Прогресс очистки событий"
+
+
+class SensorLatest(models.Model):
+    """
+    Последнее событие датчика.
+
+    Обновляется upsert'ом при каждой записи событий, поэтому чтение
+    текущих показаний стоит O(число датчиков), а не скан таблицы событий.
+    Внешнего ключа на событие нет: в секционированной таблице id событий
+    уникален только вместе с created_at.
+    """
+
+    sensor = models.OneToOneField(
+        "Sensor",
+        primary_key=True,
+        related_name="latest",
+        on_delete=models.CASCADE,
+        help_text="Сенсор",
+    )
+    event_id = models.IntegerField(help_text="ID последнего события")
+    name = models.CharField(max_length=50, null=True, blank=True)
+    temperature = models.FloatField(null=True, blank=True)
+    humidity = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(help_text="Дата и время последнего события")
+
+    class Meta:
+        db_table = "Последние события"
+        verbose_name = "Последнее событие датчика"
+        verbose_name_plural = "Последние события датчиков"
+
+
+class EventKey(models.Model):
+    """
+    Ключ идемпотентности импортированного события.
+
+    Хранится отдельно от событий: уникальный индекс секционированной
+    таблицы событий обязан включать created_at, а его проставляет сервер,
+    так что повторно присланное событие с ним бы не столкнулось. Ключи
+    вставляются INSERT ... ON CONFLICT DO NOTHING в транзакции записи
+    событий, и дубликаты отсекаются без чтения по строкам (sensors.dedup).
+    """
+
+    key = models.UUIDField(primary_key=True, help_text="Ключ содержимого события")
+    created_at = models.DateTimeField(help_text="Когда событие с этим ключом записано")
+
+    class Meta:
+        db_table = "Ключи событий"
+        verbose_name = "Ключ события"
+        verbose_name_plural = "Ключи событий"
+        indexes = [models.Index(fields=["created_at"])]
+
+
+class UploadSession(models.Model):
+    """
+    Сессия загрузки файла событий по частям.
+
+    Части пишутся прямо на свои места в файле file_path, поэтому оборванную
+    загрузку можно продолжить с недостающих частей. received_size — длина
+    непрерывно принятого начала файла: его уже можно импортировать, не
+    дожидаясь конца загрузки. Незавершённая сессия удаляется после
+    expires_at, срок продлевается каждой принятой частью.
+    """
+
+    OPEN = "open"
+    COMPLETE = "complete"
+    STATUS_CHOICES = [(OPEN, "Загружается"), (COMPLETE, "Загружена")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=OPEN, help_text="Статус загрузки"
+    )
+    file_path = models.CharField(max_length=500, help_text="Путь к файлу загрузки")
+    total_size = models.BigIntegerField(
+        null=True, blank=True, help_text="Размер файла, байт, если известен заранее"
+    )
+    received_size = models.BigIntegerField(
+        default=0, help_text="Принято байт от начала файла без пропусков"
+    )
+    engine = models.CharField(max_length=16, blank=True, help_text="Способ записи")
+    dedup = models.BooleanField(default=False, help_text="Пропускать дубликаты событий")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Время создания")
+    expires_at = models.DateTimeField(help_text="Когда незавершённая сессия удаляется")
+
+    def __str__(self):
+        return f"Загрузка {self.id}: {self.get_status_display()}."
+
+    class Meta:
+        db_table = "Сессии загрузки"
+        verbose_name = "Сессия загрузки"
+        verbose_name_plural = "Сессии загрузки"
+        indexes = [models.Index(fields=["expires_at"])]
+
+
+class UploadChunk(models.Model):
+    """Принятая часть загрузки: её место в файле и контрольная сумма."""
+
+    session = models.ForeignKey(
+        "UploadSession",
+        related_name="chunks",
+        on_delete=models.CASCADE,
+        help_text="Сессия загрузки",
+    )
+    number = models.PositiveIntegerField(help_text="Номер части")
+    offset = models.BigIntegerField(help_text="Смещение части в файле, байт")
+    size = models.BigIntegerField(help_text="Размер части, байт")
+    sha256 = models.CharField(max_length=64, help_text="SHA-256 части, hex")
+
+    class Meta:
+        db_table = "Части загрузки"
+        verbose_name = "Часть загрузки"
+        verbose_name_plural = "Части загрузки"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "number"], name="unique_upload_chunk"
+            )
+        ]
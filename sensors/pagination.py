@@ -0,0 +1,155 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from sensors.counts import exact_count, smart_count
+
+
+def encode_cursor(created_at, event_id, reverse=False):
+    """Непрозрачный курсор: base64 от ключа строки и направления обхода."""
+    key = {"t": created_at.isoformat(), "i": event_id, "r": reverse}
+    return base64.urlsafe_b64encode(json.dumps(key).encode("ascii")).decode("ascii")
+
+
+def decode_cursor(token):
+    key = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    return datetime.fromisoformat(key["t"]), int(key["i"]), bool(key["r"])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагинация событий по паре (created_at, id).
+
+    Вместо OFFSET страница выбирается условием по ключу последней строки
+    предыдущей страницы, поэтому запрос идёт по индексу created_at
+    (или (sensor_id, created_at) при фильтре по датчику) и стоит одинаково
+    на любой глубине. Направление сортировки берётся из ordering запроса
+    (created_at или -created_at, по умолчанию — от новых к старым).
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    invalid_cursor_message = "Некорректный курсор."
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return limit if limit > 0 else api_settings.PAGE_SIZE
+
+    def get_cursor_link(self, event, reverse=False):
+        url = self.request.build_absolute_uri()
+        token = encode_cursor(event.created_at, event.id, reverse)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            return decode_cursor(token)
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = self.get_cursor(request)
+        reverse = cursor is not None and cursor[2]
+
+        ordering = queryset.query.order_by
+        ascending = bool(ordering) and ordering[0] == "created_at"
+        descending = ascending == reverse
+        if descending:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        if cursor is not None:
+            created_at, event_id = cursor[:2]
+            if descending:
+                queryset = queryset.filter(created_at__lte=created_at).exclude(
+                    created_at=created_at, id__gte=event_id
+                )
+            else:
+                queryset = queryset.filter(created_at__gte=created_at).exclude(
+                    created_at=created_at, id__lte=event_id
+                )
+
+        page = list(queryset[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = page
+        return page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_cursor_link(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.get_cursor_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class EventPagination(LimitOffsetPagination):
+    """
+    limit/offset, как во всём API, а при наличии параметра cursor (даже
+    пустого — это первая страница) — KeysetPagination без COUNT(*).
+
+    На больших выборках count — оценка планировщика (см. smart_count), и в
+    ответ добавляется "count_estimated": true; точное число возвращается
+    по параметру exact_count=true.
+    """
+
+    exact_count_query_param = "exact_count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_estimated = False
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        exact = self.request.query_params.get(self.exact_count_query_param, "")
+        if exact.lower() in ("1", "true"):
+            return exact_count(queryset)
+        count, self.count_estimated = smart_count(queryset)
+        return count
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        if self.count_estimated:
+            response.data["count_estimated"] = True
+        return response
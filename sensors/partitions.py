@@ -0,0 +1,120 @@
+import logging
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+from sensors.models import Event
+
+logger = logging.getLogger(__name__)
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(moment):
+    """Начало месяца (по UTC), в который попадает moment."""
+    moment = moment.astimezone(timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start):
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [_quote(Event._meta.db_table)],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """
+    Секции таблицы событий: список (имя, начало, конец) по возрастанию.
+
+    Секция по умолчанию в список не входит.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [_quote(Event._meta.db_table)],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUNDS.search(bound)
+        if match:
+            start, end = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append((name, start, end))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(start):
+    """
+    Создаёт месячную секцию, начинающуюся в start.
+
+    События этого месяца, уже попавшие в секцию по умолчанию, переносятся в
+    новую секцию: иначе PostgreSQL не даст её подключить.
+    """
+    end = next_month(start)
+    table = _quote(Event._meta.db_table)
+    name = f"{Event._meta.db_table}_{start:%Y_%m}"
+    default = _quote(f"{Event._meta.db_table}_default")
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {_quote(name)} (LIKE {table} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE created_at >= %s "
+            f"AND created_at < %s RETURNING *) "
+            f"INSERT INTO {_quote(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {_quote(name)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    logger.info(f"Создана секция {name}")
+    return name
+
+
+def create_partitions(months_ahead=3, now=None):
+    """Создаёт недостающие секции с текущего месяца на months_ahead вперёд."""
+    existing = {start for _, start, _ in list_partitions()}
+    start = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for _ in range(months_ahead + 1):
+        if start not in existing:
+            created.append(create_partition(start))
+        start = next_month(start)
+    return created
+
+
+def drop_partitions(before):
+    """
+    Удаляет секции, целиком лежащие раньше before.
+
+    DETACH + DROP выполняется за миллисекунды и не оставляет мёртвых строк,
+    в отличие от DELETE по миллионам событий. Сводки EventRollup за
+    удалённый период остаются. Возвращает список (имя, размер в байтах).
+    """
+    table = _quote(Event._meta.db_table)
+    dropped = []
+    for name, _, end in list_partitions():
+        if end > before:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_total_relation_size(%s::regclass)", [_quote(name)])
+            size = cursor.fetchone()[0]
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {_quote(name)}")
+            cursor.execute(f"DROP TABLE {_quote(name)}")
+        logger.info(f"Удалена секция {name}")
+        dropped.append((name, size))
+    return dropped
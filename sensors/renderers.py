@@ -0,0 +1,66 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость
+    orjson = None
+
+# orjson пишет очень малые и очень большие числа иначе, чем json из stdlib:
+# экспоненту в другом виде (1e-7 против 1e-07, 1e16 против 1e+16), а числа
+# из [1e-5, 1e-4) — без экспоненты (0.0000938 против 9.38e-05). Такие числа
+# встречаются редко, и ответ с ними рендерится обычным JSONRenderer. Строки,
+# похожие на такие числа, тоже уводят на JSONRenderer — это лишь медленнее.
+_ORJSON_FLOAT_FORMAT = re.compile(rb"\d[eE]-?\d|(?<![\d.])0\.0000\d")
+
+
+def compile_row_encoder(fields):
+    """
+    Кодировщик строк values_list в словари с ключами fields.
+
+    Ключи и их порядок фиксируются один раз, и строка превращается в
+    словарь без полей и сериализаторов DRF — так же, как это сделал бы
+    сериализатор, у которого все поля — простые значения модели. Строка
+    может быть длиннее fields (например, с created_at для курсора):
+    лишние значения отбрасываются.
+    """
+    keys = tuple(fields)
+
+    def encode(rows):
+        return [dict(zip(keys, row)) for row in rows]
+
+    return encode
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен.
+
+    Ответ побайтно совпадает с ответом JSONRenderer: если orjson не
+    справился с данными (ленивые строки, Decimal и т. п.), записал число
+    не так, как json из stdlib (_ORJSON_FLOAT_FORMAT), или нужны отступы —
+    рендерит JSONRenderer.
+    Исключение — NaN и бесконечности: orjson пишет их как null, а
+    JSONRenderer падает с ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _ORJSON_FLOAT_FORMAT.search(content):
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer экранирует разделители строк, недопустимые в JavaScript.
+        return content.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
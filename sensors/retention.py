@@ -0,0 +1,157 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sensors.aggregates import bucket_start, rebuild_rollups
+from sensors.cache import invalidate_responses
+from sensors.dedup import prune_keys
+from sensors.models import CompactionState, Event, Sensor
+from sensors.partitions import drop_partitions, is_partitioned, list_partitions
+
+logger = logging.getLogger(__name__)
+
+
+def retention_policies(now=None):
+    """
+    Политики хранения из EVENTS_RETENTION_DAYS.
+
+    Возвращает список (scope, датчики, cutoff): scope — тип датчика строкой
+    или "*", датчики — подзапрос их id, cutoff — начало суток, события
+    раньше которого устарели. Граница выровнена по суткам, чтобы сводки
+    устаревшего периода строились целыми днями.
+    """
+    now = now or timezone.now()
+    typed = [int(scope) for scope in settings.EVENTS_RETENTION_DAYS if scope != "*"]
+    policies = []
+    for scope, days in settings.EVENTS_RETENTION_DAYS.items():
+        if scope == "*":
+            sensors = Sensor.objects.exclude(type__in=typed)
+        else:
+            sensors = Sensor.objects.filter(type=int(scope))
+        cutoff = bucket_start(now - timedelta(days=days), "1d")
+        policies.append((scope, sensors.values("id"), cutoff))
+    return policies
+
+
+def _delete_chunk(events, start, end, chunk_size):
+    """
+    Удаляет до chunk_size событий за [start, end) отдельной короткой транзакцией.
+
+    Возвращает число удалённых строк и их суммарный размер в байтах (на
+    PostgreSQL — по pg_column_size, на других СУБД размер не оценивается).
+    """
+    window = events.filter(created_at__gte=start, created_at__lt=end)
+    ids = list(window.values_list("id", flat=True)[:chunk_size])
+    if not ids:
+        return 0, 0
+    if connection.vendor != "postgresql":
+        deleted, _ = Event.objects.filter(id__in=ids).delete()
+        return deleted, 0
+    table = connection.ops.quote_name(Event._meta.db_table)
+    with connection.cursor() as cursor:
+        # Условие на created_at отсекает лишние секции таблицы.
+        cursor.execute(
+            f"WITH deleted AS (DELETE FROM {table} AS e WHERE e.id = ANY(%s) "
+            "AND e.created_at >= %s AND e.created_at < %s "
+            "RETURNING pg_column_size(e.*) AS size) "
+            "SELECT count(*), coalesce(sum(size), 0) FROM deleted",
+            [ids, start, end],
+        )
+        return cursor.fetchone()
+
+
+def compact_scope(scope, sensor_ids, cutoff, chunk_size, keep_until=None, pause=0):
+    """
+    Сворачивает и удаляет устаревшие события одной политики.
+
+    События обрабатываются сутками, от старых к новым: сначала сводки суток
+    перестраиваются по сырым событиям, граница записывается в
+    CompactionState, затем события удаляются пачками. Сутки раньше
+    keep_until не удаляются построчно — их секции удалит drop_partitions.
+    Возвращает число удалённых событий и их размер в байтах.
+    """
+    state, _ = CompactionState.objects.get_or_create(scope=scope)
+    events = Event.objects.filter(sensor_id__in=sensor_ids)
+    expired = events.filter(created_at__lt=cutoff).order_by("created_at")
+    deleted = size = 0
+    oldest = expired.values_list("created_at", flat=True).first()
+    while oldest is not None:
+        start = bucket_start(oldest, "1d")
+        end = bucket_start(start + timedelta(days=1), "1d")
+        if state.rolled_up_until is None or state.rolled_up_until < end:
+            with transaction.atomic():
+                rebuild_rollups(sensor_ids, since=start, until=end)
+                state.rolled_up_until = end
+                state.save(update_fields=["rolled_up_until", "updated_at"])
+
+        if keep_until is None or end > keep_until:
+            while True:
+                chunk_deleted, chunk_bytes = _delete_chunk(events, start, end, chunk_size)
+                if not chunk_deleted:
+                    break
+                deleted += chunk_deleted
+                size += chunk_bytes
+                if pause:
+                    time.sleep(pause)
+        logger.info(f"Политика {scope}: события до {end} свёрнуты в сводки")
+        oldest = (
+            expired.filter(created_at__gte=end)
+            .values_list("created_at", flat=True)
+            .first()
+        )
+    return deleted, size
+
+
+def compact_events(chunk_size=None, pause=0, vacuum=False, now=None):
+    """
+    Применяет политики хранения ко всем событиям.
+
+    Если таблица секционирована, месячные секции, устаревшие для всех
+    политик, после сборки сводок удаляются целиком, без DELETE по строкам.
+    pause — пауза между пачками удаления, чтобы не забивать реплики и диск.
+    Прерванный запуск безопасно продолжить: сводки уже обработанных суток
+    заново не собираются. Заодно удаляются ключи импорта с дедупликацией
+    старше EVENTS_DEDUP_KEY_DAYS. Возвращает отчёт со счётчиками строк и байт.
+    """
+    chunk_size = chunk_size or settings.EVENTS_COMPACT_CHUNK_SIZE
+    now = now or timezone.now()
+    policies = retention_policies(now)
+    keep_until = None
+    # Без политики "*" в секциях могут быть события датчиков, которые никто не
+    # сворачивает, и удалять секции целиком нельзя.
+    if "*" in settings.EVENTS_RETENTION_DAYS and is_partitioned():
+        global_cutoff = min(cutoff for _, _, cutoff in policies)
+        ends = [end for _, _, end in list_partitions() if end <= global_cutoff]
+        keep_until = max(ends, default=None)
+
+    report = {"policies": {}, "partitions": [], "deleted": 0, "bytes": 0}
+    report["keys"] = prune_keys(now - timedelta(days=settings.EVENTS_DEDUP_KEY_DAYS))
+    for scope, sensor_ids, cutoff in policies:
+        deleted, size = compact_scope(
+            scope, sensor_ids, cutoff, chunk_size, keep_until=keep_until, pause=pause
+        )
+        report["policies"][scope] = {"cutoff": cutoff, "deleted": deleted, "bytes": size}
+        report["deleted"] += deleted
+        report["bytes"] += size
+
+    if keep_until is not None:
+        # Строки удалённых секций не считаются: count(*) по ним стоил бы
+        # столько же, сколько построчное удаление.
+        report["partitions"] = drop_partitions(keep_until)
+        report["bytes"] += sum(size for _, size in report["partitions"])
+
+    if report["deleted"] or report["partitions"]:
+        invalidate_responses("event")
+
+    if vacuum and report["deleted"] and connection.vendor == "postgresql":
+        # Обычный VACUUM не берёт эксклюзивных блокировок и отдаёт место
+        # удалённых строк под новые вставки.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"VACUUM (ANALYZE) {connection.ops.quote_name(Event._meta.db_table)}"
+            )
+    return report
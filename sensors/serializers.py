@@ -1,15 +1,42 @@
 from rest_framework import serializers
 
-from sensors.models import Event, Sensor
+from sensors.aggregates import BUCKETS
+from sensors.export import EXPORT_FORMATS
+from sensors.models import (
+    Event,
+    ImportJob,
+    ImportJobFailure,
+    Sensor,
+    SensorLatest,
+    UploadChunk,
+    UploadSession,
+)
+from sensors.utils import IMPORT_ENGINES
+
+
+class SensorLatestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SensorLatest
+        fields = (
+            "sensor_id",
+            "event_id",
+            "name",
+            "temperature",
+            "humidity",
+            "created_at",
+        )
 
 
 class SensorSerializer(serializers.ModelSerializer):
+    latest_event = SensorLatestSerializer(source="latest", read_only=True)
+
     class Meta:
         model = Sensor
         fields = (
             "id",
             "name",
             "type",
+            "latest_event",
         )
 
 
@@ -28,5 +55,178 @@ class EventSerializer(serializers.ModelSerializer):
         )
 
 
-class UploadJSONSerializer(serializers.Serializer):
-    file = serializers.FileField()
+class PreloadedSensorField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField, который ищет датчик в заранее загруженном
+    словаре context["sensors"] (id -> Sensor) вместо запроса на каждое
+    событие. Ошибки те же, что у PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError, OverflowError):
+            # OverflowError — бесконечность, например 1e400 из JSON.
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        sensor = self.context["sensors"].get(pk)
+        if sensor is None:
+            self.fail("does_not_exist", pk_value=data)
+        return sensor
+
+
+class BulkEventSerializer(EventSerializer):
+    """EventSerializer для пакетной записи: датчики загружаются одним запросом."""
+
+    sensor_id = PreloadedSensorField(queryset=Sensor.objects.all())
+
+    @staticmethod
+    def sensor_ids(items):
+        """id датчиков, упомянутых в событиях пакета."""
+        ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    ids.add(int(item.get("sensor_id")))
+                except (TypeError, ValueError, OverflowError):
+                    pass
+        return ids
+
+    @classmethod
+    def preload_sensors(cls, items):
+        """Датчики всех событий пакета для context["sensors"]."""
+        return Sensor.objects.in_bulk(cls.sensor_ids(items))
+
+
+class EventAggregateQuerySerializer(serializers.Serializer):
+    bucket = serializers.ChoiceField(
+        choices=list(BUCKETS),
+        help_text="Интервал агрегации: 1m, 1h, 1d, 1w или 1mo",
+    )
+
+
+class EventExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(
+        choices=list(EXPORT_FORMATS),
+        default="csv",
+        help_text="Формат выгрузки: csv, ndjson (JSON Lines) или columnar (колонки)",
+    )
+    compress = serializers.ChoiceField(
+        choices=["gzip"],
+        required=False,
+        help_text="gzip — сжимать выгрузку на лету",
+    )
+
+
+class ImportOptionsSerializer(serializers.Serializer):
+    engine = serializers.ChoiceField(
+        choices=IMPORT_ENGINES,
+        required=False,
+        help_text=(
+            "Способ записи: batch — пакетами через bulk_create, row — построчно, "
+            "copy — через COPY (только PostgreSQL, на других СУБД — как batch)"
+        ),
+    )
+    background = serializers.BooleanField(
+        default=False,
+        help_text="Импортировать в фоне: сразу вернуть 202 и id задачи импорта",
+    )
+    dedup = serializers.BooleanField(
+        default=False,
+        help_text=(
+            "Пропускать уже импортированные события (по event_id или содержимому "
+            "и timestamp) и вернуть их списком duplicates"
+        ),
+    )
+
+
+class UploadJSONSerializer(ImportOptionsSerializer):
+    file = serializers.FileField(
+        help_text="JSON-массив или JSON Lines, можно сжатый gzip или zstd"
+    )
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField(help_text="Доля прочитанного файла, %")
+    events_per_second = serializers.SerializerMethodField(
+        help_text="Скорость импорта, событий в секунду"
+    )
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            "id",
+            "status",
+            "engine",
+            "dedup",
+            "file_size",
+            "bytes_read",
+            "progress",
+            "imported_count",
+            "failed_count",
+            "duplicate_count",
+            "events_per_second",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+
+    def get_progress(self, job):
+        if not job.file_size:
+            return 100.0 if job.status == ImportJob.DONE else 0.0
+        return round(min(job.bytes_read / job.file_size, 1) * 100, 1)
+
+    def get_events_per_second(self, job):
+        if job.started_at is None:
+            return None
+        elapsed = ((job.finished_at or job.updated_at) - job.started_at).total_seconds()
+        processed = job.imported_count + job.failed_count + job.duplicate_count
+        return round(processed / elapsed, 1) if elapsed > 0 else None
+
+
+class ImportJobFailureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJobFailure
+        fields = ("sensor_id", "error")
+
+
+class UploadSessionCreateSerializer(ImportOptionsSerializer):
+    total_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Размер файла, байт; если не задан, его определит последняя часть",
+    )
+
+
+class UploadChunkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadChunk
+        fields = ("number", "offset", "size", "sha256")
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunks = UploadChunkSerializer(many=True, read_only=True)
+    job_id = serializers.SerializerMethodField(
+        help_text="Задача фонового импорта, если загрузка импортируется в фоне"
+    )
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "status",
+            "total_size",
+            "received_size",
+            "engine",
+            "dedup",
+            "job_id",
+            "chunks",
+            "created_at",
+            "expires_at",
+        )
+
+    def get_job_id(self, session):
+        job = getattr(session, "job", None)
+        return job.id if job is not None else None
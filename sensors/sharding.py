@@ -0,0 +1,204 @@
+import io
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.db import connections
+
+from sensors.utils import (
+    READ_CHUNK_SIZE,
+    EventImportError,
+    ImportReport,
+    import_events,
+    is_compressed,
+    iter_event_items,
+    open_event_stream,
+    sniff_format,
+)
+
+logger = logging.getLogger(__name__)
+
+# JSON-строка целиком. Сырого перевода строки внутри неё быть не может,
+# поэтому строки JSON не переходят с одной строки файла на другую.
+_JSON_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"')
+# Строки файла длиннее этого (минифицированный JSON) не разбираются на токены.
+_MAX_LINE = 1024 * 1024
+
+
+class FileRange(io.RawIOBase):
+    """Срез файла [start, end) как отдельный бинарный поток."""
+
+    def __init__(self, path, start, end):
+        self.file = open(path, "rb")
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def _track_depth(text, depth, between):
+    """
+    Глубина вложенности и флаг «следующая строка начинается между элементами
+    массива» после куска из целых строк файла.
+    """
+    # Скобки внутри строковых значений не считаются; пустые строки файла не
+    # меняют того, стоим ли мы между элементами.
+    rest = _JSON_STRING.sub(b"0", text).rstrip()
+    if not rest:
+        return depth, between
+    depth += rest.count(b"{") + rest.count(b"[")
+    depth -= rest.count(b"}") + rest.count(b"]")
+    return depth, depth == 1 and rest.endswith(b",")
+
+
+def _array_boundaries(f, offsets):
+    """
+    Для каждого из возрастающих offsets — первое начало строки файла не раньше
+    него, с которого начинается элемент массива верхнего уровня.
+
+    Вложенность скобок отслеживается с начала файла, поэтому граница никогда
+    не попадёт между объектами вложенного списка внутри события. Построчно
+    разбирается только кусок, в котором лежит очередной offset. Дойдя до
+    слишком длинной строки, поиск останавливается: дальше границ нет.
+    """
+    boundaries = []
+    targets = iter(offsets)
+    target = next(targets, None)
+    f.seek(0)
+    pos = depth = 0
+    between = False
+    while target is not None:
+        block = f.read(READ_CHUNK_SIZE)
+        if not block:
+            break
+        if not block.endswith(b"\n"):
+            tail = f.readline(_MAX_LINE)
+            if len(tail) == _MAX_LINE and not tail.endswith(b"\n"):
+                break
+            block += tail
+        if pos + len(block) <= target:
+            depth, between = _track_depth(block, depth, between)
+            pos += len(block)
+            continue
+        for line in block.splitlines(keepends=True):
+            if pos >= target and depth == 1 and between:
+                boundaries.append(pos)
+                while target is not None and target <= pos:
+                    target = next(targets, None)
+                if target is None:
+                    break
+            depth, between = _track_depth(line, depth, between)
+            pos += len(line)
+    return boundaries
+
+
+def _find_line_boundary(f, offset, limit):
+    f.seek(offset)
+    f.readline()
+    boundary = f.tell()
+    return boundary if boundary < limit else None
+
+
+def plan_shards(path, workers):
+    """
+    Делит файл на непересекающиеся диапазоны байт [start, end).
+
+    JSON Lines режется по переводам строк. JSON-массив режется только перед
+    элементами верхнего уровня, начинающимися с новой строки; минифицированный
+    массив в одну строку разрезать нельзя, и он уходит одному процессу целиком.
+    Сжатый файл тоже не режется: смещения в нём не соответствуют событиям.
+    Возвращает формат файла и список диапазонов.
+    """
+    size = Path(path).stat().st_size
+    with open(path, "rb") as f:
+        head = f.peek(READ_CHUNK_SIZE)
+        fmt = sniff_format(head)
+        if is_compressed(head):
+            boundaries = []
+        elif fmt == "ndjson":
+            boundaries = []
+            for i in range(1, workers):
+                offset = max(size * i // workers, boundaries[-1] + 1 if boundaries else 1)
+                boundary = _find_line_boundary(f, offset, size)
+                if boundary is not None and boundary not in boundaries:
+                    boundaries.append(boundary)
+        else:
+            offsets = [size * i // workers for i in range(1, workers)]
+            boundaries = [b for b in _array_boundaries(f, offsets) if 0 < b < size]
+
+    starts = [0] + boundaries
+    ends = boundaries + [size]
+    return fmt, list(zip(starts, ends))
+
+
+def _init_worker():
+    django.setup()
+
+
+def import_shard(path, fmt, start, end, first, last, **options):
+    """Импортирует один диапазон файла; выполняется в отдельном процессе."""
+    source = io.BufferedReader(FileRange(path, start, end))
+    if first and last:
+        # Файл целиком, возможно сжатый: как и при импорте без разбиения,
+        # сжатие и формат определяются по содержимому.
+        source, fmt = open_event_stream(source)
+    stream = io.TextIOWrapper(source, encoding="utf-8-sig" if first else "utf-8")
+    with stream:
+        items = iter_event_items(stream, fmt, head=first, tail=last)
+        return import_events(items, **options)
+
+
+def import_events_sharded(path, workers, report_limit=None, **options):
+    """
+    Импортирует файл в workers процессов, у каждого своё подключение к БД.
+
+    Отчёты процессов сливаются в один в порядке следования диапазонов, в том
+    же формате, что у import_events_from_json. Датчики создаются через
+    INSERT ... ON CONFLICT DO NOTHING, поэтому гонок между процессами нет.
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Файл {path} не найден.")
+    fmt, shards = plan_shards(path, workers)
+    logger.info(f"Файл {path} разбит на {len(shards)} частей")
+
+    # Дочерние процессы не должны унаследовать открытые сокеты родителя.
+    connections.close_all()
+    report = ImportReport(report_limit)
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(
+                import_shard,
+                path,
+                fmt,
+                start,
+                end,
+                first=i == 0,
+                last=i == len(shards) - 1,
+                report_limit=report.limit,
+                **options,
+            )
+            for i, (start, end) in enumerate(shards)
+        ]
+        error = None
+        for future in futures:
+            try:
+                report.merge(future.result())
+            except EventImportError as e:
+                report.merge(e.report)
+                error = error or e
+    if error is not None:
+        raise EventImportError(str(error), report.as_dict())
+    return report.as_dict()
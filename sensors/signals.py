@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sensors.cache import invalidate_responses
+from sensors.models import Sensor
+
+# События сообщают о записи через sensors.derived: сигналы на Event заставили
+# бы Django выбирать все события датчика при каскадном удалении.
+
+
+@receiver(post_save, sender=Sensor)
+def sensor_saved(sender, **kwargs):
+    invalidate_responses("sensor")
+
+
+@receiver(post_delete, sender=Sensor)
+def sensor_deleted(sender, **kwargs):
+    invalidate_responses("sensor", "event")
@@ -0,0 +1,279 @@
+"""
+Загрузка файлов событий по частям с возможностью продолжить оборванную.
+
+Клиент создаёт сессию, отправляет части PUT-запросами с номером, смещением
+и SHA-256, а затем завершает загрузку. Каждая часть один раз пишется прямо
+на своё место в файле сессии; повтор уже принятой части безопасен. Импорт
+может читать файл, пока он ещё загружается (iter_upload): ему отдаётся
+только непрерывно принятое начало файла.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from sensors.models import ImportJob, UploadChunk, UploadSession
+from sensors.utils import READ_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+class UploadError(ValueError):
+    """Часть или сессия загрузки отклонена; status_code — код ответа API."""
+
+    status_code = 400
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+class UploadExpired(UploadError):
+    status_code = 410
+
+
+def _expires_at():
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+def create_session(total_size=None, engine=None, dedup=False, background=False):
+    """
+    Создаёт сессию загрузки и пустой файл для неё.
+
+    С background=True сразу ставится задача импорта: воркер начнёт разбирать
+    файл, как только придёт его начало.
+    """
+    jobs_dir = settings.IMPORT_JOBS_DIR
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+    session = UploadSession(
+        total_size=total_size,
+        engine=engine or "",
+        dedup=dedup,
+        expires_at=_expires_at(),
+    )
+    session.file_path = str(jobs_dir / f"{session.id.hex}.upload")
+    Path(session.file_path).touch()
+    with transaction.atomic():
+        session.save()
+        if background:
+            ImportJob.objects.create(
+                file_path=session.file_path,
+                engine=session.engine,
+                dedup=dedup,
+                file_size=total_size or 0,
+                upload=session,
+            )
+    return session
+
+
+def _lock_open_session(session_id):
+    session = UploadSession.objects.select_for_update().get(pk=session_id)
+    if session.status != UploadSession.OPEN:
+        raise UploadConflict("Загрузка уже завершена")
+    if session.expires_at <= timezone.now():
+        raise UploadExpired("Сессия загрузки истекла")
+    return session
+
+
+def _contiguous_size(session):
+    """Длина начала файла, покрытого принятыми частями без пропусков."""
+    size = session.received_size
+    chunks = session.chunks.filter(offset__gte=size).order_by("offset")
+    for offset, chunk_size in chunks.values_list("offset", "size"):
+        if offset != size:
+            break
+        size += chunk_size
+    return size
+
+
+def _check_chunk(session, number, offset, size, sha256):
+    """
+    Проверяет часть по уже принятым частям заблокированной сессии.
+
+    Возвращает уже принятую такую же часть (повтор запроса) или None.
+    """
+    existing = session.chunks.filter(number=number).first()
+    if existing is not None:
+        if (existing.offset, existing.size, existing.sha256) == (offset, size, sha256):
+            return existing
+        raise UploadConflict(f"Часть {number} уже принята с другим содержимым")
+    end = offset + size
+    if session.total_size is not None and end > session.total_size:
+        raise UploadError("Часть выходит за объявленный размер файла")
+    overlapping = session.chunks.annotate(end=F("offset") + F("size")).filter(
+        offset__lt=end, end__gt=offset
+    )
+    if overlapping.exists():
+        raise UploadConflict("Часть пересекается с уже принятыми частями")
+    return None
+
+
+def _receive(body, size, sha256, f):
+    """Пишет size байт из body в файл f, проверяя длину и SHA-256."""
+    digest = hashlib.sha256()
+    written = 0
+    for data in body:
+        written += len(data)
+        if written > size:
+            raise UploadError("Часть длиннее заявленного размера")
+        digest.update(data)
+        f.write(data)
+    if written != size:
+        raise UploadError(f"Часть получена не полностью: {written} из {size} байт")
+    if digest.hexdigest() != sha256:
+        raise UploadError("Контрольная сумма части не совпадает")
+
+
+def write_chunk(session_id, number, offset, size, sha256, body):
+    """
+    Принимает часть number: size байт из итератора body на смещение offset.
+
+    Часть принимается, только если пришла целиком и её SHA-256 совпал с
+    sha256; иначе её можно отправить заново. Повтор уже принятой части с
+    той же суммой ничего не меняет — так клиент, не дождавшийся ответа,
+    может безопасно повторить запрос. Возвращает (часть, создана ли она).
+    """
+    sha256 = sha256.strip().lower()
+    if not _SHA256.fullmatch(sha256):
+        raise UploadError("Контрольная сумма должна быть SHA-256 в hex")
+    if offset < 0 or size <= 0:
+        raise UploadError("Смещение части не может быть отрицательным, а размер — нулевым")
+    if size > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(
+            f"Часть больше UPLOAD_CHUNK_MAX_SIZE ({settings.UPLOAD_CHUNK_MAX_SIZE} байт)"
+        )
+
+    # Дешёвые проверки — до чтения тела, чтобы не принимать заведомо лишнее.
+    with transaction.atomic():
+        session = _lock_open_session(session_id)
+        existing = _check_chunk(session, number, offset, size, sha256)
+        if existing is not None:
+            return existing, False
+
+    # Тело читается без транзакции и блокировки: медленный клиент не держит
+    # соединение с БД и не задерживает другие части. Во временный файл, а не
+    # сразу на место: параллельная пересекающаяся часть испортила бы принятую.
+    with tempfile.NamedTemporaryFile(
+        dir=Path(session.file_path).parent, suffix=".part"
+    ) as part:
+        _receive(body, size, sha256, part)
+        part.flush()
+
+        # Части одной сессии ложатся в файл по очереди: под блокировкой сессии
+        # пересечения проверяются заново, пока тело читалось, могли принять другие.
+        with transaction.atomic():
+            session = _lock_open_session(session_id)
+            existing = _check_chunk(session, number, offset, size, sha256)
+            if existing is not None:
+                return existing, False
+            part.seek(0)
+            with open(session.file_path, "r+b") as f:
+                f.seek(offset)
+                shutil.copyfileobj(part, f, READ_CHUNK_SIZE)
+                f.flush()
+                os.fsync(f.fileno())
+
+            chunk = UploadChunk.objects.create(
+                session=session, number=number, offset=offset, size=size, sha256=sha256
+            )
+            session.received_size = _contiguous_size(session)
+            session.expires_at = _expires_at()
+            session.save(update_fields=["received_size", "expires_at"])
+    return chunk, True
+
+
+def finalize_session(session_id):
+    """
+    Завершает загрузку, если части покрывают файл без пропусков.
+
+    Размер файла — объявленный при создании сессии или, если он не был
+    объявлен, конец последней части.
+    """
+    with transaction.atomic():
+        session = _lock_open_session(session_id)
+        end = session.chunks.aggregate(end=Max(F("offset") + F("size")))["end"] or 0
+        expected = session.total_size if session.total_size is not None else end
+        if not session.received_size:
+            raise UploadError("Не загружено ни одной части")
+        if session.received_size != expected:
+            raise UploadError(
+                f"Загружены не все части: без пропусков принято {session.received_size} "
+                f"байт из {expected}"
+            )
+        session.status = UploadSession.COMPLETE
+        session.total_size = session.received_size
+        session.save(update_fields=["status", "total_size"])
+        ImportJob.objects.filter(upload=session).update(file_size=session.total_size)
+    return session
+
+
+def iter_upload(session, poll_interval=1.0, on_wait=None):
+    """
+    Байтовые куски файла сессии по мере его загрузки.
+
+    Отдаётся только непрерывно принятое начало файла; дойдя до его конца,
+    генератор ждёт новых частей (вызывая on_wait между проверками), пока
+    загрузка не завершена. Истёкшая или удалённая сессия обрывает чтение
+    OSError — импорт завершится ошибкой разбора с отчётом о записанном.
+    """
+    position = 0
+    with open(session.file_path, "rb") as f:
+        while True:
+            if position < session.received_size:
+                f.seek(position)
+                data = f.read(min(READ_CHUNK_SIZE, session.received_size - position))
+                position += len(data)
+                yield data
+                continue
+            if session.status == UploadSession.COMPLETE:
+                return
+            if session.expires_at <= timezone.now():
+                raise OSError("Сессия загрузки истекла")
+            if on_wait is not None:
+                on_wait()
+            time.sleep(poll_interval)
+            try:
+                session.refresh_from_db(fields=["status", "received_size", "expires_at"])
+            except UploadSession.DoesNotExist:
+                raise OSError("Сессия загрузки удалена") from None
+
+
+def discard_session(session, reason="Загрузка отменена"):
+    """Удаляет сессию и её файл; ещё не начатая задача импорта завершается ошибкой."""
+    ImportJob.objects.filter(upload=session, status=ImportJob.PENDING).update(
+        status=ImportJob.FAILED, error=reason, finished_at=timezone.now()
+    )
+    Path(session.file_path).unlink(missing_ok=True)
+    session.delete()
+
+
+def expire_upload_sessions():
+    """
+    Удаляет сессии с истёкшим сроком, кроме тех, чей импорт ещё идёт или
+    ждёт воркера после завершённой загрузки. Возвращает число удалённых сессий.
+    """
+    expired = (
+        UploadSession.objects.filter(expires_at__lt=timezone.now())
+        .exclude(job__status=ImportJob.RUNNING)
+        .exclude(status=UploadSession.COMPLETE, job__status=ImportJob.PENDING)
+    )
+    count = 0
+    for session in expired:
+        if session.status == UploadSession.OPEN:
+            logger.info(f"Загрузка {session.id} не завершена вовремя и удалена")
+        discard_session(session, "Сессия загрузки истекла")
+        count += 1
+    return count
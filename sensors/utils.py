@@ -1,62 +1,693 @@
+import gzip
+import io
 import json
 import logging
+import math
 from pathlib import Path
 
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from sensors.cache import invalidate_responses
+from sensors.dedup import KEY_FIELDS, claim_keys, event_key, skip_duplicates
+from sensors.derived import record_new_events, record_new_rows
 from sensors.models import Event, Sensor
+from sensors.validation import validate_events
+
+try:
+    import zstandard
+except ImportError:  # zstd — необязательная зависимость
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
+READ_CHUNK_SIZE = 64 * 1024
 
-def import_events_from_json(json_file: str):
-    json_path = Path(json_file)
-    if not json_path.exists():
-        raise FileNotFoundError(f"Файл {json_path} не найден.")
+# row — построчная запись (full_clean + save на каждое событие),
+# batch — пакетная запись через bulk_create, одна транзакция на пакет,
+# copy — COPY FROM STDIN в PostgreSQL (на других СУБД работает как batch).
+IMPORT_ENGINES = ("row", "batch", "copy")
+
+
+class EventImportError(ValueError):
+    """
+    Ошибка разбора файла, прервавшая импорт.
+
+    Так как события записываются по мере чтения файла, к моменту ошибки часть
+    из них уже может быть сохранена — отчёт о них лежит в report.
+    """
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+    def __reduce__(self):
+        # Ошибка передаётся между процессами при многопроцессном импорте.
+        return self.__class__, (str(self), self.report)
+
+
+class ImportReport:
+    """
+    Итог импорта событий.
+
+    Списки imported/failed (и duplicates при импорте с дедупликацией)
+    ведутся, пока их длина не превышает limit; дальше растут только
+    счётчики, и отчёт превращается в сводку.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = settings.EVENTS_IMPORT_REPORT_LIMIT if limit is None else limit
+        self.imported = []
+        self.failed = []
+        self.duplicates = []
+        self.imported_count = 0
+        self.failed_count = 0
+        self.duplicate_count = 0
+        # Пропускать ли события, ключи которых уже записаны (sensors.dedup).
+        self.dedup = False
+        # Бинарный поток исходного файла — по нему видно, сколько байт прочитано.
+        self.source = None
+
+    @property
+    def bytes_read(self):
+        return self.source.tell() if self.source is not None else 0
+
+    @property
+    def truncated(self):
+        return (
+            self.imported_count > len(self.imported)
+            or self.failed_count > len(self.failed)
+            or self.duplicate_count > len(self.duplicates)
+        )
+
+    def add_imported(self, event_id):
+        self.imported_count += 1
+        if len(self.imported) < self.limit:
+            self.imported.append(event_id)
+
+    def add_failed(self, sensor_id, error):
+        self.failed_count += 1
+        # NaN и Infinity из файла не записать в отчёт стандартным JSON.
+        if isinstance(sensor_id, float) and not math.isfinite(sensor_id):
+            sensor_id = repr(sensor_id)
+        if len(self.failed) < self.limit:
+            self.failed.append({"sensor_id": sensor_id, "error": error})
+
+    def add_duplicate(self, sensor_id, key):
+        self.duplicate_count += 1
+        if len(self.duplicates) < self.limit:
+            self.duplicates.append({"sensor_id": sensor_id, "key": str(key)})
+
+    def merge(self, result):
+        """Добавляет к отчёту результат другого импорта (в виде as_dict())."""
+        self.imported_count += result.get("imported_count", len(result["imported"]))
+        self.failed_count += result.get("failed_count", len(result["failed"]))
+        self.imported.extend(result["imported"][: max(self.limit - len(self.imported), 0)])
+        self.failed.extend(result["failed"][: max(self.limit - len(self.failed), 0)])
+        if "duplicates" in result:
+            self.dedup = True
+            duplicates = result["duplicates"]
+            self.duplicate_count += result.get("duplicate_count", len(duplicates))
+            self.duplicates.extend(duplicates[: max(self.limit - len(self.duplicates), 0)])
+
+    def flush(self):
+        """Вызывается по окончании импорта; наследники сохраняют здесь накопленное."""
+
+    def as_dict(self):
+        result = {"imported": self.imported, "failed": self.failed}
+        if self.dedup:
+            result["duplicates"] = self.duplicates
+        if self.truncated:
+            result["imported_count"] = self.imported_count
+            result["failed_count"] = self.failed_count
+            if self.dedup:
+                result["duplicate_count"] = self.duplicate_count
+            result["truncated"] = True
+        return result
+
+
+# Самый длинный токен JSON, кроме строк и чисел, — "-Infinity"; обрезанное
+# число или escape-последовательность короче.
+_MAX_JSON_TOKEN = 16
+
+
+class JSONArrayReader:
+    """
+    Поэлементный разбор JSON-массива верхнего уровня из текстового потока.
+
+    В памяти держится только текущий фрагмент файла (chunk_size символов плюс
+    недочитанный элемент), поэтому расход памяти не зависит от размера файла.
+    """
+
+    def __init__(self, stream, chunk_size=READ_CHUNK_SIZE, head=True, tail=True):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # head/tail=False — поток является срезом массива (см. sensors.sharding):
+        # без открывающей скобки и/или оканчивается запятой вместо "]".
+        self.head = head
+        self.tail = tail
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def _fill(self):
+        # Недочитанный хвост буфера читается удвоением, поэтому длинный элемент
+        # копируется O(его размера) раз в сумме, а не на каждый chunk_size.
+        chunk = self.stream.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            return False
+        pos, self.pos = self.pos, 0
+        self.buffer = self.buffer[pos:] + chunk
+        return True
+
+    def _truncated(self, error):
+        """Ошибка разбора — обрезанный концом буфера элемент, а не ошибка в JSON."""
+        return (
+            error.msg.startswith("Unterminated string")
+            or len(self.buffer) - error.pos < _MAX_JSON_TOKEN
+        )
+
+    def _peek(self):
+        while True:
+            self.pos = json.decoder.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Ошибка в середине буфера не исправится дочитыванием файла.
+                if not self._truncated(e) or not self._fill():
+                    raise
+                continue
+            # Число в самом конце буфера могло быть обрезано — дочитываем.
+            if end < len(self.buffer) or not self._fill():
+                self.pos = end
+                return item
+
+    def __iter__(self):
+        if self.head:
+            if self._peek() != "[":
+                raise ValueError("Ожидается JSON-массив событий.")
+            self.pos += 1
+            if self.tail and self._peek() == "]":
+                self.pos += 1
+                self._check_end()
+                return
+        while self.tail or self._peek():
+            yield self._decode()
+            separator = self._peek()
+            self.pos += 1
+            if separator == "]" and self.tail:
+                break
+            if separator != ",":
+                raise ValueError("Некорректный JSON: ожидается ',' или ']'.")
+        self._check_end()
+
+    def _check_end(self):
+        if self._peek():
+            raise ValueError("Некорректный JSON: лишние данные после массива.")
+
+
+def iter_ndjson(stream):
+    """Разбирает JSON Lines: по одному объекту в строке, пустые строки пропускаются."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def sniff_format(head):
+    """По первым байтам файла определяет формат: "json" (массив) или "ndjson"."""
+    head = head.lstrip()
+    if head.startswith(b"\xef\xbb\xbf"):
+        head = head[3:].lstrip()
+    return "ndjson" if head.startswith(b"{") else "json"
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_CONTENT_TYPES = {"application/gzip", "application/x-gzip"}
+ZSTD_CONTENT_TYPES = {"application/zstd"}
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+}
+
+
+class ChunkStream(io.RawIOBase):
+    """
+    Бинарный поток поверх итератора байтовых кусков.
+
+    Позволяет разбирать UploadedFile.chunks() или тело запроса по мере
+    поступления, не сохраняя их во временный файл.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = memoryview(b"")
+        self.position = 0
+
+    def readable(self):
+        return True
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    def readinto(self, buffer):
+        while not self.pending:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.pending = memoryview(chunk)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        self.position += size
+        return size
 
-    imported_events = []
-    failed_events = []
+    def tell(self):
+        return self.position
 
+
+def is_compressed(head):
+    """Сжаты ли данные gzip или zstd — по их первым байтам."""
+    return head.startswith(GZIP_MAGIC) or head.startswith(ZSTD_MAGIC)
+
+
+def open_event_stream(source, content_type=None):
+    """
+    Распаковывает поток событий и определяет его формат.
+
+    Сжатие (gzip, zstd) распознаётся по сигнатуре или Content-Type, формат
+    (JSON-массив или JSON Lines) — по Content-Type или первому символу.
+    source должен поддерживать peek(), как io.BufferedReader.
+    Возвращает распакованный бинарный поток и формат.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    magic = source.peek(len(ZSTD_MAGIC))[: len(ZSTD_MAGIC)]
+    if magic.startswith(GZIP_MAGIC) or media_type in GZIP_CONTENT_TYPES:
+        source = gzip.GzipFile(fileobj=source)
+    elif magic == ZSTD_MAGIC or media_type in ZSTD_CONTENT_TYPES:
+        if zstandard is None:
+            raise ValueError("Для распаковки zstd установите пакет zstandard.")
+        source = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(source))
+
+    if media_type in NDJSON_CONTENT_TYPES:
+        return source, "ndjson"
+    return source, sniff_format(source.peek(READ_CHUNK_SIZE))
+
+
+def iter_event_items(stream, fmt, head=True, tail=True):
+    if fmt == "ndjson":
+        return iter_ndjson(stream)
+    return JSONArrayReader(stream, head=head, tail=tail)
+
+
+def _prepare_events(items, report):
+    """
+    Отбрасывает заведомо некорректные элементы и готовит поля события:
+    пары (sensor_id, данные), а при report.dedup — тройки с ключом события.
+    """
     model_fields = {field.name for field in Event._meta.get_fields()}
+    known_fields = model_fields | set(KEY_FIELDS) if report.dedup else model_fields
+
+    for item in items:
+        if not isinstance(item, dict):
+            report.add_failed(None, "Событие должно быть JSON-объектом")
+            continue
 
-    for item in data:
         sensor_id = item.get("sensor_id")
-        extra_fields = set(item.keys()) - model_fields
+        extra_fields = set(item.keys()) - known_fields
         for field in extra_fields:
             logger.warning(
                 f"Поле '{field}' у события с sensor_id={sensor_id} проигнорировано"
             )
 
+        if not isinstance(sensor_id, int) or isinstance(sensor_id, bool):
+            report.add_failed(sensor_id, "sensor_id должен быть целым числом")
+            continue
+        if sensor_id <= 0:
+            report.add_failed(sensor_id, "sensor_id должен быть положительным")
+            continue
+
         event_data = {
             k: v
             for k, v in item.items()
             if k in model_fields and k not in ["id", "sensor_id"]
         }
+        if report.dedup:
+            yield sensor_id, event_data, event_key(sensor_id, item)
+        else:
+            yield sensor_id, event_data
 
-        if sensor_id <= 0:
-            failed_events.append(
-                {"sensor_id": sensor_id, "error": "sensor_id должен быть положительным"}
-            )
-            continue
 
-        sensor, created = Sensor.objects.get_or_create(
-            id=sensor_id, defaults={"name": "N/A", "type": 0}
-        )
+class SensorResolver:
+    """
+    Кэш датчиков на время одного импорта.
+
+    Для пакета sensor_id одним запросом id__in выясняет, каких датчиков ещё
+    нет, и создаёт их одним INSERT ... ON CONFLICT DO NOTHING, так что
+    параллельные импорты не мешают друг другу. Уже проверенные id
+    запоминаются и больше в БД не запрашиваются.
+    """
+
+    def __init__(self):
+        self.known = set()
+
+    def resolve(self, sensor_ids):
+        missing = set(sensor_ids) - self.known
+        if not missing:
+            return
+        existing = set(Sensor.objects.filter(id__in=missing).values_list("id", flat=True))
+        created = sorted(missing - existing)
         if created:
-            logger.warning(
-                f"Датчик с sensor_id={sensor_id} ранее не был в базе данных. "
-                f"Присваивается type = 0"
+            Sensor.objects.bulk_create(
+                [Sensor(id=sensor_id, name="N/A", type=0) for sensor_id in created],
+                ignore_conflicts=True,
             )
+            invalidate_responses("sensor")
+            for sensor_id in created:
+                logger.warning(
+                    f"Датчик с sensor_id={sensor_id} ранее не был в базе данных. "
+                    f"Присваивается type = 0"
+                )
+        self.known |= missing
 
-        event = Event(sensor_id=sensor, **event_data)
+
+def _save_events(events, report, resolver):
+    for sensor_id, event_data, *key in events:
+        resolver.resolve([sensor_id])
+        event = Event(sensor_id_id=sensor_id, **event_data)
 
         try:
             event.full_clean()
-            event.save()
-            imported_events.append(event.id)
         except Exception as e:
             logger.exception(f"Ошибка при добавлении события для sensor_id={sensor_id}")
-            failed_events.append({"sensor_id": sensor_id, "error": str(e)})
+            report.add_failed(sensor_id, str(e))
+            continue
+        _save_row(event, report, *key)
+
+
+def _save_row(event, report, key=None):
+    """
+    Записывает событие в своей точке сохранения. С ключом событие
+    записывается, только если такого ключа ещё нет, иначе это дубликат.
+    """
+    try:
+        with transaction.atomic():
+            new = key is None or bool(claim_keys([key], timezone.now()))
+            if new:
+                event.save()
+                record_new_events([event])
+    except Exception as e:
+        logger.exception(
+            f"Ошибка при добавлении события для sensor_id={event.sensor_id_id}"
+        )
+        report.add_failed(event.sensor_id_id, str(e))
+        return
+    if new:
+        report.add_imported(event.id)
+    else:
+        report.add_duplicate(event.sensor_id_id, key)
+
+
+def _validate_batch(batch, report):
+    """
+    Проверяет пакет по столбцам (validate_events) и записывает отклонённые
+    события в отчёт. Возвращает принятые события (sensor_id, очищенные данные).
+    """
+    valid, invalid = validate_events(batch)
+    for sensor_id, error in invalid:
+        logger.warning(f"Событие для sensor_id={sensor_id} не прошло валидацию: {error}")
+        report.add_failed(sensor_id, str(error))
+    return valid
+
+
+def _save_batch(batch, report, resolver):
+    """
+    Записывает пакет событий одной транзакцией.
+
+    Ошибки валидации отсекаются построчно до записи и не мешают остальным
+    событиям пакета. Если bulk_create всё же упал на уровне БД, пакет
+    дописывается построчно, каждое событие в своей точке сохранения.
+    """
+    valid = _validate_batch(batch, report)
+
+    if not valid:
+        return
+
+    # Датчики создаются вне транзакции пакета: откат пакета не должен
+    # оставить в кэше резолвера id, которых в БД уже нет.
+    resolver.resolve({sensor_id for sensor_id, *_ in valid})
+    rows, duplicates = valid, []
+    try:
+        with transaction.atomic():
+            if report.dedup:
+                rows, duplicates = skip_duplicates(valid, timezone.now())
+            # Существование датчика гарантирует SensorResolver, лишний запрос не нужен.
+            events = [Event(sensor_id_id=s, **cleaned) for s, cleaned in rows]
+            Event.objects.bulk_create(events)
+            record_new_events(events)
+    except DatabaseError:
+        logger.exception("Ошибка пакетной записи, пакет записывается построчно")
+        _save_rows(valid, report)
+        return
+
+    for event in events:
+        report.add_imported(event.id)
+    for sensor_id, key in duplicates:
+        report.add_duplicate(sensor_id, key)
+
+
+def _save_rows(rows, report):
+    """Построчная запись принятых событий (sensor_id, данные[, ключ])."""
+    for sensor_id, cleaned, *key in rows:
+        _save_row(Event(sensor_id_id=sensor_id, **cleaned), report, *key)
+
+
+def _save_events_batched(events, report, resolver, batch_size, save_batch=_save_batch):
+    batch = []
+    try:
+        for event in events:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                save_batch(batch, report, resolver)
+                batch = []
+    finally:
+        # События, прочитанные до ошибки разбора, записываются как и в режиме row.
+        if batch:
+            save_batch(batch, report, resolver)
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    if isinstance(value, float):
+        return repr(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class CopyBuffer(io.TextIOBase):
+    """
+    Файлоподобный источник для COPY FROM STDIN.
+
+    Строки формата text формируются лениво, по мере того как драйвер
+    вычитывает буфер, поэтому весь пакет целиком текстом в памяти не лежит.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.pending = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts = [self.pending]
+        length = len(self.pending)
+        for row in self.rows:
+            line = "\t".join(_copy_value(value) for value in row) + "\n"
+            parts.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(parts)
+        if size < 0:
+            size = len(data)
+        self.pending = data[size:]
+        return data[:size]
+
+
+COPY_FIELDS = ("id", "sensor_id", "name", "temperature", "humidity", "created_at")
+
+
+def _copy_sql():
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(Event._meta.get_field(f).column) for f in COPY_FIELDS)
+    return f"COPY {quote(Event._meta.db_table)} ({columns}) FROM STDIN"
+
+
+def _copy_rows(cursor, rows, created_at):
+    """COPY событий (sensor_id, очищенные данные); возвращает их id."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        [connection.ops.quote_name(Event._meta.db_table), len(rows)],
+    )
+    ids = [row[0] for row in cursor.fetchall()]
+    copy_rows = [
+        (event_id, sensor_id, *(cleaned[f] for f in COPY_FIELDS[2:5]), created_at)
+        for event_id, (sensor_id, cleaned) in zip(ids, rows)
+    ]
+    cursor.copy_expert(_copy_sql(), CopyBuffer(copy_rows))
+    record_new_rows(copy_rows)
+    return ids
+
+
+def _copy_batch(batch, report, resolver):
+    """
+    Записывает пакет событий через COPY FROM STDIN.
+
+    id заранее берутся из последовательности таблицы одним запросом, чтобы
+    вернуть их в отчёте, а created_at проставляется здесь же: auto_now_add
+    при COPY не срабатывает.
+    """
+    valid = _validate_batch(batch, report)
+
+    if not valid:
+        return
+
+    resolver.resolve({sensor_id for sensor_id, *_ in valid})
+    created_at = timezone.now()
+    rows, duplicates, ids = valid, [], []
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            if report.dedup:
+                rows, duplicates = skip_duplicates(valid, created_at)
+            if rows:
+                ids = _copy_rows(cursor, rows, created_at)
+    except DatabaseError:
+        logger.exception("Ошибка записи через COPY, пакет записывается построчно")
+        _save_rows(valid, report)
+        return
+
+    for event_id in ids:
+        report.add_imported(event_id)
+    for sensor_id, key in duplicates:
+        report.add_duplicate(sensor_id, key)
+
+
+def import_events(
+    items,
+    report_limit: int = None,
+    engine: str = None,
+    batch_size: int = None,
+    report: ImportReport = None,
+    dedup: bool = False,
+):
+    """
+    Импортирует события из итератора разобранных JSON-объектов.
+
+    Разбор, валидация и запись идут конвейером генераторов, так что в памяти
+    одновременно находится одно событие (для engine="batch" и "copy" — один
+    пакет из batch_size событий). Вместо report_limit можно передать свой
+    report — наследник ImportReport. С dedup=True события, ключи которых
+    уже записаны (sensors.dedup), пропускаются и попадают в отчёт как
+    duplicates.
+    """
+    engine = engine or settings.EVENTS_IMPORT_ENGINE
+    if engine not in IMPORT_ENGINES:
+        raise ValueError(f"Неизвестный способ импорта: {engine}")
+    if engine == "copy" and connection.vendor != "postgresql":
+        engine = "batch"
+    batch_size = batch_size or settings.EVENTS_IMPORT_BATCH_SIZE
+
+    report = report or ImportReport(report_limit)
+    report.dedup = dedup
+    resolver = SensorResolver()
+    events = _prepare_events(items, report)
+    try:
+        if engine == "copy":
+            _save_events_batched(events, report, resolver, batch_size, _copy_batch)
+        elif engine == "batch":
+            _save_events_batched(events, report, resolver, batch_size)
+        else:
+            _save_events(events, report, resolver)
+    except ValueError as e:
+        raise EventImportError(str(e), report.as_dict()) from e
+    finally:
+        report.flush()
+
+    return report.as_dict()
+
+
+def _import_binary(source, content_type, report, **options):
+    report.source = source
+    try:
+        stream, fmt = open_event_stream(source, content_type)
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    except (OSError, ValueError) as e:
+        raise EventImportError(str(e), report.as_dict()) from e
+    try:
+        return import_events(iter_event_items(text, fmt), report=report, **options)
+    except (OSError, EOFError) as e:
+        # Битый или оборванный gzip/zstd обнаруживается только при чтении.
+        raise EventImportError(str(e), report.as_dict()) from e
+
+
+def import_events_from_json(
+    json_file: str,
+    report_limit: int = None,
+    engine: str = None,
+    batch_size: int = None,
+    report: ImportReport = None,
+    dedup: bool = False,
+):
+    """
+    Импортирует события из файла: JSON-массива объектов или JSON Lines,
+    возможно сжатого gzip или zstd.
+
+    Файл читается потоково, формат и сжатие определяются по его началу.
+    """
+    json_path = Path(json_file)
+    if not json_path.exists():
+        raise FileNotFoundError(f"Файл {json_path} не найден.")
+
+    report = report or ImportReport(report_limit)
+    with open(json_path, "rb") as source:
+        return _import_binary(
+            source, None, report, engine=engine, batch_size=batch_size, dedup=dedup
+        )
+
 
-    return {"imported": imported_events, "failed": failed_events}
+def import_events_from_stream(
+    chunks,
+    content_type: str = None,
+    report_limit: int = None,
+    engine: str = None,
+    batch_size: int = None,
+    report: ImportReport = None,
+    dedup: bool = False,
+):
+    """
+    Импортирует события из итератора байтовых кусков, например
+    UploadedFile.chunks() или тела запроса, без промежуточного файла.
+    """
+    report = report or ImportReport(report_limit)
+    source = io.BufferedReader(ChunkStream(chunks), READ_CHUNK_SIZE)
+    return _import_binary(
+        source, content_type, report, engine=engine, batch_size=batch_size, dedup=dedup
+    )
@@ -0,0 +1,171 @@
+"""
+Пакетная валидация импортируемых событий по столбцам.
+
+Event.full_clean() на каждое событие прогоняет поля и валидаторы DRF/Django
+для одного экземпляра за раз и стоит дороже самой записи. Здесь пакет
+проверяется столбцами: диапазоны температуры и влажности — одним
+сравнением массива (на NumPy, если он установлен), названия — валидаторами
+поля по одному разу на уникальное значение. События, которые столбцовая
+проверка отклонила или не умеет проверить (строки вместо чисел, лишние
+поля и т. п.), проверяются clean_event_data — поэтому решения и тексты
+ошибок совпадают с валидаторами модели.
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from sensors.models import Event
+
+try:
+    import numpy
+except ImportError:  # numpy — необязательная зависимость
+    numpy = None
+
+NUMERIC_FIELDS = ("temperature", "humidity")
+FAST_FIELDS = frozenset(("name", *NUMERIC_FIELDS))
+# Целые больше 2**53 float() приводит с потерей точности, а огромные — с
+# OverflowError; такие значения проверяются построчно.
+MAX_EXACT_INT = 2**53
+
+
+def _numeric_range(field):
+    """
+    Границы [lo, hi] из MinValueValidator/MaxValueValidator поля или None,
+    если у поля есть другие валидаторы и по столбцу его проверить нельзя.
+    """
+    lo, hi = float("-inf"), float("inf")
+    for validator in field.validators:
+        if isinstance(validator, MinValueValidator):
+            lo = max(lo, validator.limit_value)
+        elif isinstance(validator, MaxValueValidator):
+            hi = min(hi, validator.limit_value)
+        else:
+            return None
+    return lo, hi
+
+
+NUMERIC_RANGES = {
+    name: _numeric_range(Event._meta.get_field(name)) for name in NUMERIC_FIELDS
+}
+NAME_FIELD = Event._meta.get_field("name")
+
+
+def clean_event_data(event_data):
+    """
+    Валидирует поля события без создания экземпляра модели.
+
+    Повторяет Event.clean_fields(exclude=["sensor_id"]): те же проверки,
+    приведение типов и текст ошибок. Возвращает очищенные значения.
+    """
+    cleaned = {}
+    errors = {}
+    for field in Event._meta.concrete_fields:
+        if field.name in ("id", "sensor_id"):
+            continue
+        raw_value = event_data.get(field.name, field.get_default())
+        if field.blank and raw_value in field.empty_values:
+            cleaned[field.name] = raw_value
+            continue
+        try:
+            cleaned[field.name] = field.clean(raw_value, None)
+        except ValidationError as e:
+            errors[field.name] = e.error_list
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def _is_plain_number(value):
+    if value is None or type(value) is float:
+        return True
+    return type(value) is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT
+
+
+def _out_of_range(values, lo, hi):
+    """
+    Индексы значений вне [lo, hi]. None и NaN диапазон не нарушают — как и у
+    MinValueValidator/MaxValueValidator, где сравнение с NaN ложно.
+    """
+    if numpy is not None:
+        column = numpy.array(values, dtype=float)
+        return numpy.flatnonzero((column < lo) | (column > hi)).tolist()
+    return [
+        i
+        for i, value in enumerate(values)
+        if value is not None and (value < lo or value > hi)
+    ]
+
+
+def _valid_names(names):
+    """Уникальные названия, прошедшие валидаторы поля name."""
+    valid = set()
+    for name in set(names):
+        if name is None or name == "":
+            valid.add(name)
+            continue
+        try:
+            NAME_FIELD.run_validators(name)
+        except ValidationError:
+            continue
+        valid.add(name)
+    return valid
+
+
+def validate_events(batch):
+    """
+    Проверяет пакет событий (sensor_id, данные события) из _prepare_events.
+
+    Возвращает два списка в исходном порядке: принятые события
+    (sensor_id, очищенные данные) — как у clean_event_data — и отклонённые
+    (sensor_id, ValidationError) с теми же ошибками, что дал бы full_clean.
+    Остальные элементы кортежа события (ключ при импорте с дедупликацией)
+    переносятся в принятое событие как есть.
+    """
+    slow = set()
+    fast = []
+    for index, (_, data, *_) in enumerate(batch):
+        if data.keys() <= FAST_FIELDS and all(
+            _is_plain_number(data.get(name)) for name in NUMERIC_FIELDS
+        ):
+            name = data.get("name")
+            if name is None or type(name) is str:
+                fast.append(index)
+                continue
+        slow.add(index)
+
+    names = [batch[index][1].get("name") for index in fast]
+    valid_names = _valid_names(names)
+    for position, name in enumerate(names):
+        if name not in valid_names:
+            slow.add(fast[position])
+    for field in NUMERIC_FIELDS:
+        if NUMERIC_RANGES[field] is None:
+            slow.update(fast)
+            break
+        values = [batch[index][1].get(field) for index in fast]
+        slow.update(
+            fast[position] for position in _out_of_range(values, *NUMERIC_RANGES[field])
+        )
+
+    valid, invalid = [], []
+    for index, (sensor_id, data, *extra) in enumerate(batch):
+        if index in slow:
+            try:
+                valid.append((sensor_id, clean_event_data(data), *extra))
+            except ValidationError as e:
+                invalid.append((sensor_id, e))
+            continue
+        temperature, humidity = data.get("temperature"), data.get("humidity")
+        valid.append(
+            (
+                sensor_id,
+                {
+                    "name": data.get("name"),
+                    "temperature": None if temperature is None else float(temperature),
+                    "humidity": None if humidity is None else float(humidity),
+                    "created_at": None,
+                },
+                *extra,
+            )
+        )
+    return valid, invalid
@@ -1,27 +1,145 @@
-import tempfile
+from pathlib import Path
 
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_yasg.utils import swagger_auto_schema
-from rest_framework import filters, status, viewsets
+from django_filters.utils import translate_validation
+from drf_yasg import openapi
+from drf_yasg.utils import no_body, swagger_auto_schema
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 
 # from rest_framework.renderers import JSONRenderer # Fix? for 405 error
 from rest_framework.response import Response
 
-from .filters import EventFilter
-from .models import Event, Sensor
-from .serializers import EventSerializer, SensorSerializer, UploadJSONSerializer
-from .utils import import_events_from_json
+from .aggregates import aggregate, stream_json
+from .cache import cache_response, get_response_cache
+from .derived import record_changed_events, record_new_events
+from .export import EXPORT_FORMATS, export_events
+from .filters import EventFilter, SensorEventFilter
+from .ingest import get_ingest_buffer
+from .jobs import enqueue_import
+from .models import Event, ImportJob, Sensor, SensorLatest, UploadSession
+from .pagination import EventPagination, KeysetPagination
+from .renderers import FastJSONRenderer, compile_row_encoder
+from .serializers import (
+    BulkEventSerializer,
+    EventAggregateQuerySerializer,
+    EventExportQuerySerializer,
+    EventSerializer,
+    ImportJobFailureSerializer,
+    ImportJobSerializer,
+    ImportOptionsSerializer,
+    SensorLatestSerializer,
+    SensorSerializer,
+    UploadChunkSerializer,
+    UploadJSONSerializer,
+    UploadSessionCreateSerializer,
+    UploadSessionSerializer,
+)
+from .uploads import (
+    UploadError,
+    create_session,
+    discard_session,
+    finalize_session,
+    write_chunk,
+)
+from .utils import (
+    READ_CHUNK_SIZE,
+    EventImportError,
+    import_events_from_json,
+    import_events_from_stream,
+)
+
+# Ответ на одиночное событие, принятое в буфер без ожидания записи.
+EVENT_QUEUED = {"status": "queued", "message": "Событие будет записано пакетом."}
 
 
 class SensorViewSet(viewsets.ModelViewSet):
-    queryset = Sensor.objects.all()
+    queryset = Sensor.objects.select_related("latest")
     serializer_class = SensorSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["name", "id"]
     ordering = ["id"]
 
+    # Ответы о датчиках содержат последнее событие, поэтому зависят и от событий.
+    @cache_response("sensor", "event")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response("sensor", "event")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "События датчика с курсорной пагинацией по индексу (sensor_id, created_at). "
+            "Существование датчика не проверяется: для неизвестного id вернётся пустой "
+            "список. ordering=created_at — от старых к новым."
+        ),
+        manual_parameters=[
+            openapi.Parameter(name, openapi.IN_QUERY, description, type=kind)
+            for name, kind, description in [
+                ("since", openapi.TYPE_STRING, "Начало периода (ISO 8601), включительно"),
+                ("until", openapi.TYPE_STRING, "Конец периода (ISO 8601), не включая"),
+                ("ordering", openapi.TYPE_STRING, "created_at или -created_at"),
+                ("cursor", openapi.TYPE_STRING, "Курсор из ссылок next/previous"),
+                ("limit", openapi.TYPE_INTEGER, "Размер страницы"),
+            ]
+        ],
+        responses={200: EventSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"], filter_backends=[])
+    @cache_response("event")
+    def events(self, request, *args, **kwargs):
+        try:
+            sensor_id = int(kwargs["pk"])
+        except ValueError:
+            raise NotFound()
+        # Отдельный запрос на существование датчика не делается: событий
+        # неизвестного датчика нет, и ответ просто будет пустым.
+        filterset = SensorEventFilter(
+            request.query_params,
+            queryset=Event.objects.filter(sensor_id=sensor_id),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        ordering = request.query_params.get("ordering")
+        events = filterset.qs.order_by(
+            "created_at" if ordering == "created_at" else "-created_at"
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(events, request, self)
+        return paginator.get_paginated_response(EventSerializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Последнее событие каждого датчика. Значения берутся из таблицы "
+            "последних событий, которая обновляется при каждой записи событий, "
+            "а не вычисляются по всей таблице событий. Датчики без событий не "
+            "попадают в список."
+        ),
+        responses={200: SensorLatestSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], filter_backends=[])
+    @cache_response("event")
+    def latest(self, request, *args, **kwargs):
+        page = self.paginate_queryset(SensorLatest.objects.order_by("sensor_id"))
+        return self.get_paginated_response(SensorLatestSerializer(page, many=True).data)
+
+
+# Поля списка событий в порядке EventSerializer: ни одно из них не требует
+# преобразований DRF, поэтому список строится из values_list без экземпляров
+# моделей. created_at нужен курсорной пагинации и в ответ не попадает.
+EVENT_LIST_FIELDS = EventSerializer.Meta.fields
+encode_event_rows = compile_row_encoder(EVENT_LIST_FIELDS)
+
 
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
@@ -30,14 +148,232 @@ class EventViewSet(viewsets.ModelViewSet):
     filterset_class = EventFilter
     ordering_fields = ["created_at"]
     ordering = ["-created_at"]
+    pagination_class = EventPagination
 
     parser_classes = [MultiPartParser]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @cache_response("event")
+    def list(self, request, *args, **kwargs):
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            *EVENT_LIST_FIELDS, "created_at", named=True
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(encode_event_rows(rows))
+        return self.get_paginated_response(encode_event_rows(page))
+
+    @cache_response("event")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        responses={
+            201: EventSerializer,
+            202: "Событие принято в буфер и будет записано пакетом",
+            400: "Ошибка валидации",
+        }
+    )
+    def create(self, request, *args, **kwargs):
+        buffer = get_ingest_buffer()
+        if buffer is None:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        event = Event(**serializer.validated_data)
+        # Под ASGI wsgi.multithread нет, а запросы обрабатываются параллельно.
+        buffer.add(event, concurrent=request.META.get("wsgi.multithread", True))
+        if not buffer.durable:
+            return Response(EVENT_QUEUED, status=status.HTTP_202_ACCEPTED)
+        serializer.instance = event
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Статистика записи одиночных событий пакетами: число пакетов и "
+            "событий, размер пакета и время записи (мс) по последним пакетам."
+        ),
+        responses={200: "Статистика буфера", 404: "Запись пакетами выключена"},
+    )
+    @action(detail=False, methods=["get"], url_path="ingest-stats", filter_backends=[])
+    def ingest_stats(self, request, *args, **kwargs):
+        buffer = get_ingest_buffer()
+        if buffer is None:
+            raise NotFound("Запись событий пакетами выключена (EVENTS_INGEST_BUFFER)")
+        return Response(buffer.stats())
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Статистика кэша ответов API этого процесса: попадания, промахи и "
+            "ответы 304 Not Modified."
+        ),
+        responses={200: "Статистика кэша", 404: "Кэш ответов выключен"},
+    )
+    @action(detail=False, methods=["get"], url_path="cache-stats", filter_backends=[])
+    def cache_stats(self, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        if response_cache is None:
+            raise NotFound("Кэш ответов API выключен (API_CACHE_BACKEND)")
+        return Response(response_cache.stats())
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            event = serializer.save()
+            record_new_events([event])
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        old_key = (instance.sensor_id_id, instance.created_at)
+        with transaction.atomic():
+            event = serializer.save()
+            record_changed_events([old_key, (event.sensor_id_id, event.created_at)])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            record_changed_events([(instance.sensor_id_id, instance.created_at)])
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Число событий и min/max/avg температуры и влажности по каждому "
+            "датчику за интервалы времени. Учитывает те же фильтры, что и список "
+            "событий; ответ отдаётся потоком без пагинации."
+        ),
+        query_serializer=EventAggregateQuerySerializer,
+        responses={200: "Агрегаты по интервалам", 400: "Неверные параметры"},
+    )
+    @action(detail=False, methods=["get"])
+    def aggregate(self, request, *args, **kwargs):
+        serializer = EventAggregateQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        bucket = serializer.validated_data["bucket"]
+        filterset = DjangoFilterBackend().get_filterset(request, self.get_queryset(), self)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        rows = aggregate(filterset, bucket)
+        return StreamingHttpResponse(
+            stream_json({"bucket": bucket}, rows), content_type="application/json"
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Выгрузка всех событий, подходящих под фильтры списка, в CSV, NDJSON или "
+            "колоночном двоичном формате (см. README). "
+            "Ответ отдаётся потоком без пагинации; строки читаются из БД серверным "
+            "курсором пачками, так что размер выгрузки не ограничен памятью."
+        ),
+        query_serializer=EventExportQuerySerializer,
+        responses={200: "Файл выгрузки", 400: "Неверные параметры"},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        serializer = EventExportQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        output = serializer.validated_data["output"]
+        compress = serializer.validated_data.get("compress") == "gzip"
+        queryset = self.filter_queryset(self.get_queryset())
+
+        content_type, extension = EXPORT_FORMATS[output]
+        if compress:
+            content_type, extension = "application/gzip", f"{extension}.gz"
+        response = StreamingHttpResponse(
+            export_events(
+                queryset, output, compress, chunk_size=settings.EVENTS_EXPORT_CHUNK_SIZE
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="events.{extension}"'
+        return response
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Пакетное создание событий: тело — JSON-массив событий в формате "
+            "POST /events/ (не больше EVENTS_BULK_MAX_SIZE). Каждое событие "
+            "проверяется отдельно; корректные записываются одной транзакцией, для "
+            "каждого в results возвращается id или ошибки валидации."
+        ),
+        method="post",
+        request_body=EventSerializer(many=True),
+        responses={
+            201: "Все события созданы",
+            207: "Часть событий не прошла проверку",
+            400: "Ни одно событие не создано",
+        },
+    )
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser])
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"detail": "Ожидается JSON-массив событий."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.EVENTS_BULK_MAX_SIZE:
+            return Response(
+                {
+                    "detail": f"Слишком много событий в запросе: {len(items)}, "
+                    f"максимум {settings.EVENTS_BULK_MAX_SIZE}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        context = {
+            **self.get_serializer_context(),
+            "sensors": BulkEventSerializer.preload_sensors(items),
+        }
+        results, events = [], []
+        for index, item in enumerate(items):
+            serializer = BulkEventSerializer(data=item, context=context)
+            if serializer.is_valid():
+                events.append(Event(**serializer.validated_data))
+                results.append({"index": index, "status": "created"})
+            else:
+                results.append(
+                    {"index": index, "status": "error", "errors": serializer.errors}
+                )
+
+        if events:
+            with transaction.atomic():
+                Event.objects.bulk_create(
+                    events, batch_size=settings.EVENTS_IMPORT_BATCH_SIZE
+                )
+                record_new_events(events)
+        created = iter(events)
+        for result in results:
+            if result["status"] == "created":
+                result["id"] = next(created).id
+
+        if not events and items:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(events) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(
+            {
+                "created": len(events),
+                "failed": len(items) - len(events),
+                "results": results,
+            },
+            status=response_status,
+        )
 
     @swagger_auto_schema(
-        operation_description="Импорт событий из JSON-файла",
+        operation_description=(
+            "Импорт событий из JSON-файла (массив или JSON Lines, можно gzip/zstd). "
+            "Вместо multipart-формы файл можно передать телом запроса с "
+            "Content-Type application/json, application/x-ndjson, application/gzip "
+            "или application/zstd; engine, background и dedup тогда задаются в query."
+        ),
         method="post",
         request_body=UploadJSONSerializer,
-        responses={200: "Успешный импорт", 400: "Ошибка при импорте"},
+        responses={
+            201: "Успешный импорт",
+            202: "Импорт поставлен в очередь",
+            400: "Ошибка при импорте",
+        },
     )
     @action(
         detail=False,
@@ -46,28 +382,219 @@ class EventViewSet(viewsets.ModelViewSet):
         # renderer_classes=[JSONRenderer] # Fix? for 405 error
     )
     def upload_json(self, request, *args, **kwargs):
+        if not request.content_type.startswith("multipart/"):
+            # Тело запроса разбирается по мере чтения, не дожидаясь конца загрузки.
+            serializer = ImportOptionsSerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            body = request.stream
+            chunks = iter(lambda: body.read(READ_CHUNK_SIZE), b"") if body else []
+            return self._import(chunks, request.content_type, serializer.validated_data)
+
         serializer = UploadJSONSerializer(data=request.data)
         if serializer.is_valid():
             uploaded_file = serializer.validated_data["file"]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp_file:
-                for chunk in uploaded_file.chunks():
-                    tmp_file.write(chunk)
-                tmp_file_path = tmp_file.name
-
-            try:
-                imported_ids = import_events_from_json(tmp_file_path)
-                return Response(
-                    {
-                        "status": "ok",
-                        "imported_count": len(imported_ids.get("imported", [])),
-                        "imported_events": imported_ids,
-                        "message": "Импорт завершён успешно.",
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
-            except Exception as e:
-                return Response(
-                    {"status": "error", "message": str(e)},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            return self._import(
+                uploaded_file.chunks(),
+                uploaded_file.content_type,
+                serializer.validated_data,
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def _import(self, chunks, content_type, options):
+        if options["background"]:
+            job = enqueue_import(chunks, options.get("engine"), options["dedup"])
+            return queued_response(self.request, self.kwargs["version"], job)
+        return import_response(
+            lambda: import_events_from_stream(
+                chunks, content_type, engine=options.get("engine"), dedup=options["dedup"]
+            ),
+            options["dedup"],
+        )
+
+
+def queued_response(request, version, job):
+    """Ответ 202 на импорт, поставленный в очередь задачей job."""
+    job_url = reverse("import-job-detail", kwargs={"version": version, "pk": job.pk})
+    return Response(
+        {
+            "status": "queued",
+            "job_id": job.pk,
+            "job_url": request.build_absolute_uri(job_url),
+            "message": "Импорт поставлен в очередь.",
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def import_response(run_import, dedup=False):
+    """Ответ на синхронный импорт; run_import() возвращает отчёт import_events."""
+    try:
+        imported_ids = run_import()
+    except EventImportError as e:
+        return Response(
+            {"status": "error", "message": str(e), "imported_events": e.report},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except Exception as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    result = {
+        "status": "ok",
+        "imported_count": imported_ids.get(
+            "imported_count", len(imported_ids["imported"])
+        ),
+        "imported_events": imported_ids,
+        "message": "Импорт завершён успешно.",
+    }
+    if dedup:
+        result["duplicate_count"] = imported_ids.get(
+            "duplicate_count", len(imported_ids["duplicates"])
+        )
+    return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ImportJobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+    @swagger_auto_schema(
+        operation_description="События, не прошедшие импорт, постранично",
+        responses={200: ImportJobFailureSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def failures(self, request, *args, **kwargs):
+        failures = self.get_object().failures.order_by("id")
+        page = self.paginate_queryset(failures)
+        serializer = ImportJobFailureSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class UploadSessionViewSet(
+    mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet
+):
+    """
+    Загрузка файла событий по частям: POST создаёт сессию, PUT
+    chunks/{номер}/ принимает часть, POST finalize/ завершает загрузку и
+    импортирует файл. GET показывает принятые части — с них оборванную
+    загрузку и продолжают.
+    """
+
+    queryset = UploadSession.objects.prefetch_related("chunks").select_related("job")
+    serializer_class = UploadSessionSerializer
+
+    @swagger_auto_schema(
+        request_body=UploadSessionCreateSerializer,
+        responses={201: UploadSessionSerializer, 400: "Неверные параметры"},
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        session = create_session(**serializer.validated_data)
+        session = self.get_queryset().get(pk=session.pk)
+        return Response(
+            UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED
+        )
+
+    def perform_destroy(self, instance):
+        discard_session(instance)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Часть файла телом запроса (application/octet-stream). Повтор уже "
+            "принятой части с той же суммой безопасен и возвращает 200."
+        ),
+        method="put",
+        request_body=no_body,
+        manual_parameters=[
+            openapi.Parameter(
+                "Upload-Offset",
+                openapi.IN_HEADER,
+                description="Смещение части в файле, байт",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+            openapi.Parameter(
+                "Upload-Checksum",
+                openapi.IN_HEADER,
+                description="SHA-256 части в hex",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            200: UploadChunkSerializer,
+            201: UploadChunkSerializer,
+            400: "Часть получена не полностью или с неверной суммой",
+            409: "Часть пересекается с принятыми или загрузка завершена",
+            410: "Сессия загрузки истекла",
+        },
+    )
+    @action(detail=True, methods=["put"], url_path=r"chunks/(?P<number>\d+)")
+    def chunk(self, request, number, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            checksum = request.headers["Upload-Checksum"]
+            size = int(request.META["CONTENT_LENGTH"])
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    "detail": (
+                        "Нужны заголовки Upload-Offset, Upload-Checksum и Content-Length"
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Тело пишется на диск по мере чтения, не собираясь в памяти.
+        body = request.stream
+        chunks = iter(lambda: body.read(READ_CHUNK_SIZE), b"") if body else []
+        try:
+            chunk, created = write_chunk(
+                session.pk, int(number), offset, size, checksum, chunks
+            )
+        except UploadError as e:
+            return Response({"detail": str(e)}, status=e.status_code)
+        return Response(
+            UploadChunkSerializer(chunk).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Завершает загрузку и импортирует файл (в фоне — если сессия создана "
+            "с background=true, тогда импорт уже идёт)."
+        ),
+        method="post",
+        request_body=no_body,
+        responses={
+            201: "Успешный импорт",
+            202: "Импорт идёт в фоне",
+            400: "Загружены не все части",
+            409: "Загрузка уже завершена",
+            410: "Сессия загрузки истекла",
+        },
+    )
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            session = finalize_session(session.pk)
+        except UploadError as e:
+            return Response({"detail": str(e)}, status=e.status_code)
+
+        job = ImportJob.objects.filter(upload=session).first()
+        if job is not None:
+            return queued_response(request, self.kwargs["version"], job)
+        try:
+            return import_response(
+                lambda: import_events_from_json(
+                    session.file_path, engine=session.engine or None, dedup=session.dedup
+                ),
+                session.dedup,
+            )
+        finally:
+            Path(session.file_path).unlink(missing_ok=True)